@@ -3,6 +3,7 @@ from flask import Flask, request, jsonify, send_from_directory
 import pickle
 import stats
 from practica import PokerGame, Action
+from cards import cards_to_ui
 
 app = Flask(__name__, static_folder='.')
 
@@ -84,9 +85,9 @@ def start_hand():
     if result == 'allin':
         logs = [
             "=== Mano forzada con all-in automático ===",
-            f"Tus cartas: {game.player_hole}",
-            f"Cartas del bot: {game.bot_hole}",
-            f"Comunitarias: {game.community_cards}",
+            f"Tus cartas: {cards_to_ui(game.player_hole)}",
+            f"Cartas del bot: {cards_to_ui(game.bot_hole)}",
+            f"Comunitarias: {cards_to_ui(game.community_cards)}",
             format_chips(),
             "--- Showdown directo por falta de fichas ---"
         ]
@@ -102,7 +103,7 @@ def start_hand():
             f"Dealer: JUGADOR -> SB={game.small_blind} (jugador), BB={game.big_blind} (bot)",
             "=== Nueva mano ===",
             "Dealer: PLAYER",
-            f"Tus cartas: {game.player_hole}",
+            f"Tus cartas: {cards_to_ui(game.player_hole)}",
             format_chips(),
             f"--- Nueva ronda de apuestas (inicia: {game.get_first_actor().upper()}) ---"
         ]
@@ -111,7 +112,7 @@ def start_hand():
             f"Dealer: BOT -> SB={game.small_blind} (bot), BB={game.big_blind} (jugador)",
             "=== Nueva mano ===",
             "Dealer: BOT",
-            f"Tus cartas: {game.player_hole}",
+            f"Tus cartas: {cards_to_ui(game.player_hole)}",
             format_chips(),
             f"--- Nueva ronda de apuestas (inicia: {game.get_first_actor().upper()}) ---"
         ]
@@ -130,7 +131,7 @@ def start_hand():
         
 
     return jsonify({
-        'player_hole': game.player_hole,
+        'player_hole': cards_to_ui(game.player_hole),
         'bot_hole': ["card_back", "card_back"],
         'community_cards': [],
         'pot': game.pot,
@@ -193,9 +194,9 @@ def player_action():
             return respuesta
 
         return jsonify({
-            'player_hole': game.player_hole,
+            'player_hole': cards_to_ui(game.player_hole),
             'bot_hole': ["card_back", "card_back"],
-            'community_cards': (
+            'community_cards': cards_to_ui(
                 (game.community_cards[:3] if game.street_index >= 1 else []) +
                 (game.community_cards[3:4] if game.street_index >= 2 else []) +
                 (game.community_cards[4:5] if game.street_index >= 3 else [])
@@ -250,11 +251,11 @@ def player_action():
         game.next_street()
         logs = ["Ronda de apuestas completada."]
         if game.street_index == 1:
-            logs.append(f"Flop: {game.community_cards[:3]}")
+            logs.append(f"Flop: {cards_to_ui(game.community_cards[:3])}")
         elif game.street_index == 2:
-            logs.append(f"Turn: {game.community_cards[:4]}")
+            logs.append(f"Turn: {cards_to_ui(game.community_cards[:4])}")
         elif game.street_index == 3:
-            logs.append(f"River: {game.community_cards[:5]}")
+            logs.append(f"River: {cards_to_ui(game.community_cards[:5])}")
         logs.append(format_chips())
         logs.append(f"--- Nueva ronda de apuestas (inicia: {game.get_first_actor().upper()}) ---")
         current_hand_logs.extend(logs)
@@ -270,9 +271,9 @@ def player_action():
                 return respuesta
 
         return jsonify({
-            'player_hole': game.player_hole,
+            'player_hole': cards_to_ui(game.player_hole),
             'bot_hole': ["card_back", "card_back"],
-            'community_cards': (
+            'community_cards': cards_to_ui(
                 (game.community_cards[:3] if game.street_index >= 1 else []) +
                 (game.community_cards[3:4] if game.street_index >= 2 else []) +
                 (game.community_cards[4:5] if game.street_index >= 3 else [])
@@ -341,9 +342,9 @@ def player_action():
         return _resolve_showdown(current_hand_logs.copy())
 
     return jsonify({
-        'player_hole': game.player_hole,
+        'player_hole': cards_to_ui(game.player_hole),
         'bot_hole': ["card_back", "card_back"],
-        'community_cards': (
+        'community_cards': cards_to_ui(
             (game.community_cards[:3] if game.street_index >= 1 else []) +
             (game.community_cards[3:4] if game.street_index >= 2 else []) +
             (game.community_cards[4:5] if game.street_index >= 3 else [])
@@ -392,11 +393,11 @@ def _end_hand_response(all_logs, show_bot_cards=True):
     except Exception as e:
         print("ERROR al guardar last_hand.log:", e)
 
-    bot_cards = game.bot_hole if show_bot_cards else ["card_back", "card_back"]
+    bot_cards = cards_to_ui(game.bot_hole) if show_bot_cards else ["card_back", "card_back"]
     resp = {
-        'player_hole': game.player_hole,
+        'player_hole': cards_to_ui(game.player_hole),
         'bot_hole': bot_cards,
-        'community_cards': game.community_cards,
+        'community_cards': cards_to_ui(game.community_cards),
         'pot': game.pot,
         'player_chips': game.player_chips,
         'bot_chips': game.bot_chips,
@@ -429,8 +430,8 @@ def _resolve_showdown(logs_before):
         game.reveal_remaining_community_cards()
 
     # 2) Evaluar manos
-    player_best = game.evaluate_hand7(game.player_hole + game.community_cards)
-    bot_best = game.evaluate_hand7(game.bot_hole + game.community_cards)
+    player_best = game.player_state.strength
+    bot_best = game.bot_state.strength
 
     player_desc = game.describe_hand(player_best)
     bot_desc = game.describe_hand(bot_best)
@@ -447,8 +448,8 @@ def _resolve_showdown(logs_before):
 
     showdown_logs = [
         "Showdown!",
-        f"Tus cartas: {game.player_hole} + Comunidad: {game.community_cards}",
-        f"Cartas del bot: {game.bot_hole} + Comunidad: {game.community_cards}",
+        f"Tus cartas: {cards_to_ui(game.player_hole)} + Comunidad: {cards_to_ui(game.community_cards)}",
+        f"Cartas del bot: {cards_to_ui(game.bot_hole)} + Comunidad: {cards_to_ui(game.community_cards)}",
         f"Tu mejor jugada: {player_desc}",
         f"Mejor jugada del bot: {bot_desc}",
         f"-- Reparto del pot: Main Pot={main_pot}, Side Pot={side_pot} (Total repartido: {main_pot + side_pot} fichas)"
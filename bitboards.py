@@ -0,0 +1,167 @@
+# bitboards.py
+# Proyectos y emparejamientos con máscaras de bits. Una mano se resume en 4
+# palabras de 13 bits (una por palo, bit 0 = '2', bit 12 = 'A'); todo lo demás
+# son desplazamientos, máscaras y tablas de 8192 entradas indexadas por la
+# máscara de ranks. Cada kernel tiene versión escalar y versión por lotes.
+
+import numpy as np
+
+from cards import suit_rank_masks
+
+RANK_MASK = 0x1FFF
+_WHEEL4 = (1 << 12) | 0b111   # A-2-3-4
+
+# Clases de proyecto de escalera
+NO_DRAW, GUTSHOT, OPEN_ENDED, STRAIGHT = 0, 1, 2, 3
+
+
+# ------------------------------------------
+# Tablas por máscara de ranks
+# ------------------------------------------
+def _popcount(x):
+    return bin(x).count('1')
+
+
+def _ace_low(mask):
+    """Máscara de 14 bits con el As duplicado abajo (bit 0 = As, bit 1 = '2'...)."""
+    return (mask << 1) | (mask >> 12 & 1)
+
+
+def _straight_class(mask):
+    ext = _ace_low(mask)
+    if ext & ext >> 1 & ext >> 2 & ext >> 3 & ext >> 4:
+        return STRAIGHT
+    run4 = ext & ext >> 1 & ext >> 2 & ext >> 3
+    # Cuatro seguidas con hueco libre a ambos lados (ni A-2-3-4 ni J-Q-K-A)
+    if run4 & 0b1111111110:
+        return OPEN_ENDED
+    for i in range(10):
+        if _popcount(ext >> i & 0b11111) == 4:
+            return GUTSHOT
+    return NO_DRAW
+
+
+def _legacy_straight_draw(mask):
+    # Criterio histórico de las features: 4 seguidas empezando en 2..T, o A-2-3-4
+    run4 = mask & mask >> 1 & mask >> 2 & mask >> 3
+    return 1 if run4 & 0x1FF or mask & _WHEEL4 == _WHEEL4 else 0
+
+
+def _connectedness(mask):
+    total_pairs = _popcount(mask) - 1
+    return _popcount(mask & mask >> 1) / total_pairs if total_pairs > 0 else 0.0
+
+
+STRAIGHT_CLASS = np.array([_straight_class(m) for m in range(1 << 13)], dtype=np.uint8)
+STRAIGHT_DRAW = np.array([_legacy_straight_draw(m) for m in range(1 << 13)], dtype=np.uint8)
+CONNECTEDNESS = np.array([_connectedness(m) for m in range(1 << 13)])
+POPCOUNT = np.array([_popcount(m) for m in range(1 << 13)], dtype=np.uint8)
+
+# Copias en listas de Python para la vía escalar
+_STRAIGHT_CLASS = STRAIGHT_CLASS.tolist()
+_STRAIGHT_DRAW = STRAIGHT_DRAW.tolist()
+_CONNECTEDNESS = CONNECTEDNESS.tolist()
+_POPCOUNT = POPCOUNT.tolist()
+
+
+# ------------------------------------------
+# Vía escalar
+# ------------------------------------------
+def rank_word(words):
+    return words[0] | words[1] | words[2] | words[3]
+
+
+def paired_word(words):
+    """Ranks presentes en al menos dos palos (parejas o más)."""
+    a, b, c, d = words
+    return (a & b) | (a & c) | (a & d) | (b & c) | (b & d) | (c & d)
+
+
+def flush_draw(hole, board):
+    """1 si algún palo de las cartas propias aparece ≥2 veces en el board."""
+    board_words = suit_rank_masks(board)
+    for c in hole:
+        if _POPCOUNT[board_words[c // 13]] >= 2:
+            return 1
+    return 0
+
+
+def straight_draw(hole, board):
+    """Flag histórico: 4 ranks seguidos (2..T como inicio, o A-2-3-4)."""
+    return _STRAIGHT_DRAW[rank_word(suit_rank_masks(list(hole) + list(board)))]
+
+
+def straight_class(hole, board):
+    """NO_DRAW, GUTSHOT, OPEN_ENDED o STRAIGHT de hole + board."""
+    return _STRAIGHT_CLASS[rank_word(suit_rank_masks(list(hole) + list(board)))]
+
+
+def board_connectedness(board):
+    if len(board) < 3:
+        return 0.0
+    return _CONNECTEDNESS[rank_word(suit_rank_masks(board))]
+
+
+def pair_flags(hole, board):
+    """(pocket_pair, board_paired, pair_with_board) como enteros 0/1."""
+    hole_bits = [1 << (c % 13) for c in hole]
+    board_words = suit_rank_masks(board)
+    board_ranks = rank_word(board_words)
+    return (
+        1 if hole_bits[0] == hole_bits[1] else 0,
+        1 if paired_word(board_words) else 0,
+        1 if (hole_bits[0] | hole_bits[1]) & board_ranks else 0,
+    )
+
+
+# ------------------------------------------
+# Vía por lotes (NumPy)
+# ------------------------------------------
+def batch_suit_words(cards):
+    """
+    cards: array (N, n) de cartas enteras (-1 = hueco).
+    Devuelve (N, 4) con la máscara de ranks de cada palo.
+    """
+    cards = np.asarray(cards, dtype=np.int64).reshape(len(cards), -1)
+    valid = cards >= 0
+    bits = np.where(valid, 1 << (cards % 13), 0)
+    suits = cards // 13
+    return np.stack(
+        [np.bitwise_or.reduce(np.where(suits == s, bits, 0), axis=1) for s in range(4)], axis=1
+    )
+
+
+def batch_draw_features(holes, boards):
+    """
+    holes: (N, 2); boards: (N, k) con 0 <= k <= 5 (-1 = carta aún no vista).
+    Devuelve un dict de arrays (N,) con flush_draw, straight_draw (criterio
+    histórico), straight_class, pocket_pair, board_paired, pair_with_board
+    y connectedness.
+    """
+    holes = np.asarray(holes, dtype=np.int64)
+    boards = np.asarray(boards, dtype=np.int64).reshape(len(holes), -1)
+    hole_w = batch_suit_words(holes)
+    board_w = batch_suit_words(boards)
+    all_ranks = np.bitwise_or.reduce(hole_w | board_w, axis=1)
+    board_ranks = np.bitwise_or.reduce(board_w, axis=1)
+
+    board_counts = POPCOUNT[board_w]                   # (N, 4) cartas del board por palo
+    hole_suits = holes // 13
+    rows = np.arange(len(holes))[:, None]
+    flush = (board_counts[rows, hole_suits] >= 2).any(axis=1)
+
+    a, b, c, d = board_w.T
+    board_paired = ((a & b) | (a & c) | (a & d) | (b & c) | (b & d) | (c & d)) != 0
+    hole_ranks = holes % 13
+    hole_bits = (1 << hole_ranks[:, 0]) | (1 << hole_ranks[:, 1])
+
+    n_board = (boards >= 0).sum(axis=1)
+    return {
+        'flush_draw': flush.astype(np.int64),
+        'straight_draw': STRAIGHT_DRAW[all_ranks].astype(np.int64),
+        'straight_class': STRAIGHT_CLASS[all_ranks],
+        'pocket_pair': (hole_ranks[:, 0] == hole_ranks[:, 1]).astype(np.int64),
+        'board_paired': board_paired.astype(np.int64),
+        'pair_with_board': (hole_bits & board_ranks != 0).astype(np.int64),
+        'connectedness': np.where(n_board >= 3, CONNECTEDNESS[board_ranks], 0.0),
+    }
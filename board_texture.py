@@ -0,0 +1,141 @@
+# board_texture.py
+# Textura de flops y turns por tabla: índice combinatorio del board -> clase
+# isomorfa por palos -> arrays compactos (textura, palos, escaleras).
+# La tabla se genera offline con build_texture_table.py; la conexión del board
+# está en bitboards.board_connectedness.
+
+import os
+from itertools import permutations
+from math import comb
+import numpy as np
+
+from cards import rank_of, suit_of, to_index
+
+TEXTURE_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'board_texture.npz')
+
+TEXTURES = ("dry", "wet", "neutral")
+
+# Conteos de cartas por palo (ordenados) -> código de patrón
+SUIT_PATTERNS = ((1, 1, 1), (2, 1), (3,), (1, 1, 1, 1), (2, 1, 1), (2, 2), (3, 1), (4,))
+_SUIT_PATTERN_CODE = {p: i for i, p in enumerate(SUIT_PATTERNS)}
+
+# Escaleras como conjuntos de ranks 2..14 (la rueda usa el As como 1)
+_STRAIGHTS = [set(range(lo, lo + 5)) for lo in range(2, 11)] + [{14, 2, 3, 4, 5}]
+
+# Pares de ranks de dos cartas (incluye parejas)
+_RANK_PAIRS = [(r1, r2) for r1 in range(2, 15) for r2 in range(r1, 15)]
+
+_SUIT_PERMUTATIONS = list(permutations(range(4)))
+
+
+# ------------------------------------------
+# Índice combinatorio y forma canónica
+# ------------------------------------------
+_BINOM = [[comb(c, k) for c in range(52)] for k in range(1, 6)]
+
+
+def board_index(cards):
+    """Índice colex 0..C(52, n)-1 de un conjunto de n cartas enteras."""
+    return sum(_BINOM[i][c] for i, c in enumerate(sorted(cards)))
+
+
+def canonical_board(cards):
+    """Representante isomorfo por palos: la menor tupla ordenada de las 24 permutaciones."""
+    return min(
+        tuple(sorted(perm[c // 13] * 13 + c % 13 for c in cards))
+        for perm in _SUIT_PERMUTATIONS
+    )
+
+
+# ------------------------------------------
+# Cálculo directo (usado al construir la tabla y como respaldo)
+# ------------------------------------------
+def compute_texture(flop):
+    """'dry' o 'wet' de un flop (mismo criterio que determine_board_texture)."""
+    suits = [suit_of(c) for c in flop]
+    for s in set(suits):
+        if suits.count(s) >= 2:
+            return "wet"
+    ranks = sorted(rank_of(c) for c in flop)
+    if ranks[2] - ranks[0] <= 4:
+        return "wet"
+    return "dry"
+
+
+def compute_suit_pattern(board):
+    counts = [0, 0, 0, 0]
+    for c in board:
+        counts[suit_of(c)] += 1
+    return _SUIT_PATTERN_CODE[tuple(sorted((n for n in counts if n), reverse=True))]
+
+
+def compute_straight_potential(board):
+    """Número de pares de ranks de dos cartas que completan escalera con el board."""
+    ranks = set(rank_of(c) for c in board)
+    return sum(
+        1 for r1, r2 in _RANK_PAIRS
+        if any(s <= ranks | {r1, r2} for s in _STRAIGHTS)
+    )
+
+
+# ------------------------------------------
+# Carga de la tabla y consultas
+# ------------------------------------------
+def _load_texture_table(path=TEXTURE_TABLE_FILE):
+    """{3: campos del flop, 4: campos del turn}; {} si la tabla no existe."""
+    if not os.path.exists(path):
+        return {}
+    tables = {3: {}, 4: {}}
+    with np.load(path) as data:
+        for name in data.files:
+            street, field = name.split('_', 1)
+            values = data[name]
+            # Listas de Python: el acceso escalar es más rápido que en arrays
+            tables[3 if street == 'flop' else 4][field] = values.tolist()
+    return tables
+
+
+_TEXTURE_TABLE = _load_texture_table()
+
+
+_B1, _B2, _B3, _B4 = _BINOM[:4]
+
+
+def _lookup(board, field):
+    """
+    Valor tabulado de field para un flop o turn de cartas enteras; None si
+    no está en la tabla.
+    """
+    table = _TEXTURE_TABLE.get(len(board))
+    if table is None or field not in table:
+        return None
+    b = sorted(board)
+    idx = _B1[b[0]] + _B2[b[1]] + _B3[b[2]]
+    if len(b) == 4:
+        idx += _B4[b[3]]
+    return table[field][table['class'][idx]]
+
+
+def flop_texture(flop):
+    """'dry' / 'wet' del flop (3 cartas); 'neutral' si hay menos."""
+    if len(flop) < 3:
+        return "neutral"
+    code = _lookup(flop[:3], 'texture')
+    if code is None:
+        return compute_texture([to_index(c) for c in flop[:3]])
+    return TEXTURES[code]
+
+
+def suit_pattern(board):
+    """Patrón de palos del board como tupla de conteos, p. ej. (2, 1)."""
+    code = _lookup(board, 'suit_pattern')
+    if code is None:
+        code = compute_suit_pattern([to_index(c) for c in board])
+    return SUIT_PATTERNS[code]
+
+
+def straight_potential(board):
+    value = _lookup(board, 'straight_potential')
+    if value is None:
+        return compute_straight_potential([to_index(c) for c in board])
+    return value
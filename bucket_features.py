@@ -1,172 +1,56 @@
-import random
 import numpy as np
 from poker_env import INITIAL_STACK
-from treys import Card as TreysCard, Evaluator as TreysEvaluator
-
-_evaluator = TreysEvaluator()
-
-# ------------------------------------------
-# Función para convertir (rank, suit) → Treys
-# ------------------------------------------
-def _card_to_str(card):
-    rank_map = {14: 'A', 13: 'K', 12: 'Q', 11: 'J', 10: 'T'}
-    suit_map = {0: 's', 1: 'h', 2: 'd', 3: 'c'}
-    r = rank_map.get(card[0], str(card[0]))
-    s = suit_map.get(card[1], 's')
-    return r + s
+from cards import to_tuple
+from bitboards import batch_draw_features, board_connectedness, flush_draw, straight_draw
+from equity_engine import batch_equity, is_hand_in_range, equity
 
 # --------------------------------------------------------
 # 1) SIMULACIÓN DE EQUITY REAL CON PERFIL DE OPONENTE
 # --------------------------------------------------------
-def is_hand_in_range(card1, card2, profile="balanced"):
-    ranks_sorted = sorted([card1[0], card2[0]], reverse=True)
-    suits_list = [card1[1], card2[1]]
-    gap = abs(ranks_sorted[0] - ranks_sorted[1])
-    same_suit = suits_list[0] == suits_list[1]
-
-    high_card = ranks_sorted[0]
-    low_card = ranks_sorted[1]
-
-    is_pair = high_card == low_card
-    is_suited = same_suit
-    is_connector = gap <= 1
-    both_high = high_card >= 11 and low_card >= 10  # QJ, KQ, AJ...
-
-    if profile == "tight":
-        if is_pair and high_card >= 9:
-            return True
-        if both_high and is_suited:
-            return True
-        if is_connector and is_suited and high_card >= 10:
-            return True
-        return False
-
-    elif profile == "loose":
-        if is_pair:
-            return True
-        if is_connector:
-            return True
-        if is_suited and high_card >= 6:
-            return True
-        if high_card >= 10:
-            return True
-        return False
-
-    else:  # "balanced"
-        if is_pair and high_card >= 7:
-            return True
-        if both_high:
-            return True
-        if is_connector and is_suited:
-            return True
-        if is_connector:
-            return True
-        return False
-
-def real_equity_estimate(hole, community, num_sim=100, profile="balanced"):
-    ranks = list(range(2, 15))
-    suits = list(range(4))
-    full_deck = [(r, s) for s in suits for r in ranks]
-
-    used = set(hole + community)
-    deck = [c for c in full_deck if c not in used]
-
-    # Generar posibles manos del oponente
-    possible_opp_hands = []
-    for i in range(len(deck)):
-        for j in range(i + 1, len(deck)):
-            c1, c2 = deck[i], deck[j]
-            if is_hand_in_range(c1, c2, profile=profile):
-                possible_opp_hands.append((c1, c2))
-
-    # Si ninguna mano pasó el filtro, usar todas
-    if not possible_opp_hands:
-        for i in range(len(deck)):
-            for j in range(i + 1, len(deck)):
-                possible_opp_hands.append((deck[i], deck[j]))
-
-    wins = 0
-    ties = 0
-    losses = 0
-
-    for _ in range(num_sim):
-        random.shuffle(possible_opp_hands)
-        opp_hole = possible_opp_hands[0]
-
-        missing = 5 - len(community)
-        board = community.copy()
-
-        used_sim = set(hole + community + list(opp_hole))
-        deck_sim = [c for c in full_deck if c not in used_sim]
-        random.shuffle(deck_sim)
-        board.extend(deck_sim[:missing])
-
-        treys_board = [TreysCard.new(_card_to_str(c)) for c in board]
-        treys_hand0 = [TreysCard.new(_card_to_str(c)) for c in hole]
-        treys_hand1 = [TreysCard.new(_card_to_str(c)) for c in opp_hole]
-
-        score0 = _evaluator.evaluate(treys_board, treys_hand0)
-        score1 = _evaluator.evaluate(treys_board, treys_hand1)
-
-        if score0 < score1:
-            wins += 1
-        elif score0 == score1:
-            ties += 1
-        else:
-            losses += 1
-
-    total = wins + ties + losses
-    if total == 0:
-        return 0.0
-    return (wins + ties / 2) / total
+def real_equity_estimate(hole, community, num_sim=100, profile="balanced", exact=None,
+                         variance_reduction=(), return_stderr=False):
+    """
+    En turn y river la equity se enumera de forma exacta (num_sim se ignora)
+    salvo que se pase exact=False. variance_reduction y return_stderr se
+    pasan tal cual a equity_engine.equity.
+    """
+    return equity(hole, community, num_sim=num_sim, profile=profile, exact=exact,
+                  variance_reduction=variance_reduction, return_stderr=return_stderr)
 
 # --------------------------------------------------------
 # 2) FEATURES “ENRIQUECIDAS” PARA BUCKETIZACIÓN AVANZADA
 # --------------------------------------------------------
 def has_flush_draw(hole, community):
-    suits_h = [c[1] for c in hole]
-    suits_b = [c[1] for c in community]
-    for s in set(suits_h):
-        if suits_b.count(s) >= 2:
-            return 1
-    return 0
+    return flush_draw(hole, community)
 
 def has_straight_draw(hole, community):
-    ranks = set([c[0] for c in hole + community])
-    for r in range(2, 11):
-        if all([(r + i) in ranks for i in range(4)]):
-            return 1
-    if {14, 2, 3, 4}.issubset(ranks):
-        return 1
-    return 0
-
-def board_connectedness(community):
-    if len(community) < 3:
-        return 0.0
-    rs = sorted(set([c[0] for c in community]))
-    pairs = 0
-    total_pairs = len(rs) - 1
-    for i in range(total_pairs):
-        if rs[i + 1] - rs[i] == 1:
-            pairs += 1
-    return pairs / total_pairs if total_pairs > 0 else 0.0
+    return straight_draw(hole, community)
 
 def effective_hand_strength(hole, community, num_mc=50):
     return real_equity_estimate(hole, community, num_sim=num_mc)
 
 
 
-def hand_to_features_enhanced(hole, community, pot, history, to_act):
+def hand_to_features_enhanced(hole, community, pot, history, to_act, ehs=None, hand_state=None,
+                              potential=None):
+    """
+    ehs: equity ya calculada (p. ej. por un EquityService); si es None se
+    estima aquí con 20 simulaciones.
+    hand_state: HandState de (hole, community) si el llamador ya lo mantiene;
+    los flags se leen de él en vez de recalcularse.
+    potential: dict de equity_engine.hand_potential; si se pasa, se añaden
+    al final PPot, NPot y EHS² (modelos entrenados con potential_features).
+    """
     f = []
 
-    # 1) Cartas propias
+    # 1) Cartas propias (como (rank, suit), igual que con las tuplas antiguas)
     for c in hole:
-        f.extend(c)
+        f.extend(to_tuple(c))
 
     # 2) Cartas comunitarias (rellenar hasta 5)
     for i in range(5):
         if i < len(community):
-            f.extend(community[i])
+            f.extend(to_tuple(community[i]))
         else:
             f.extend([0, 0])
 
@@ -180,12 +64,80 @@ def hand_to_features_enhanced(hole, community, pot, history, to_act):
     f.append(history.count('r'))
 
     # 6) Flags
-    f.append(has_flush_draw(hole, community))
-    f.append(has_straight_draw(hole, community))
-    f.append(board_connectedness(community))
+    if hand_state is not None:
+        f.append(hand_state.flush_draw)
+        f.append(hand_state.straight_draw)
+        f.append(hand_state.connectedness)
+    else:
+        f.append(has_flush_draw(hole, community))
+        f.append(has_straight_draw(hole, community))
+        f.append(board_connectedness(community))
 
     # 7) EHS y pot ratio
-    f.append(effective_hand_strength(hole, community, num_mc=20))
+    if ehs is None:
+        ehs = effective_hand_strength(hole, community, num_mc=20)
+    f.append(ehs)
     f.append(pot / (pot + 2 * INITIAL_STACK))
 
+    # 8) Potencial de mano (opcional)
+    if potential is not None:
+        f.append(potential['ppot'])
+        f.append(potential['npot'])
+        f.append(potential['ehs2'])
+
     return np.array(f, dtype=float)
+
+
+def hand_to_features_batch(holes, boards, pots, histories, to_acts, ehs=None, potentials=None):
+    """
+    Versión por lotes de hand_to_features_enhanced: N estados -> matriz (N, F)
+    con las mismas columnas. pots, histories y to_acts pueden ser un valor
+    común o una secuencia por estado. Si ehs es None, la columna EHS se llena
+    con batch_equity (20 simulaciones en el flop, igual que la versión escalar).
+    potentials: lista de dicts de hand_potential (añade PPot, NPot y EHS²).
+    """
+    n = len(holes)
+    pots = np.broadcast_to(np.asarray(pots, dtype=float), (n,))
+    to_acts = np.broadcast_to(np.asarray(to_acts, dtype=float), (n,))
+    if isinstance(histories, str):
+        raises = np.full(n, histories.count('r'), dtype=float)
+    else:
+        raises = np.array([h.count('r') for h in histories], dtype=float)
+
+    hole_arr = np.array(holes, dtype=np.int64).reshape(n, 2)
+    board_arr = np.full((n, 5), -1, dtype=np.int64)
+    for i, b in enumerate(boards):
+        board_arr[i, :len(b)] = b
+    cards = np.hstack([hole_arr, board_arr])
+    seen = cards >= 0
+
+    # 1-2) Cartas como (rank, suit), con (0, 0) en los huecos del board
+    card_feats = np.empty((n, 14))
+    card_feats[:, 0::2] = np.where(seen, cards % 13 + 2, 0)
+    card_feats[:, 1::2] = np.where(seen, cards // 13, 0)
+
+    # 6) Flags por bitboards
+    draws = batch_draw_features(hole_arr, board_arr)
+
+    # 7) EHS
+    if ehs is None:
+        ehs = batch_equity(holes, boards, num_sim=20)
+    ehs = np.asarray(ehs, dtype=float)
+
+    columns = [
+        card_feats,
+        pots[:, None] / INITIAL_STACK,
+        to_acts[:, None],
+        raises[:, None],
+        draws['flush_draw'][:, None],
+        draws['straight_draw'][:, None],
+        draws['connectedness'][:, None],
+        ehs[:, None],
+        (pots / (pots + 2 * INITIAL_STACK))[:, None],
+    ]
+
+    # 8) Potencial de mano (opcional)
+    if potentials is not None:
+        columns.append(np.array([[p['ppot'], p['npot'], p['ehs2']] for p in potentials]))
+
+    return np.hstack(columns).astype(float)
@@ -0,0 +1,246 @@
+# bucketing.py
+# Asignación de buckets sin pasar por sklearn: centroides del KMeans ya
+# ajustado + medias normas precalculadas; el bucket es el centroide más
+# cercano, calculado con NumPy para un vector o para una matriz de features.
+# También calcula, guarda y carga las tablas de buckets de cartas de
+# preflop y flop (CFRTrainer(use_bucket_tables=True)).
+
+import os
+import zlib
+from itertools import combinations, permutations
+import numpy as np
+
+from board_texture import canonical_board
+from equity_engine import NUM_CLASSES, batch_equity, class_representative, hand_class
+from hand_evaluator import _save_atomic
+
+
+class BucketAssigner:
+    """
+    Centroide más cercano con la misma fórmula que KMeans.predict:
+    argmin_k (||c_k||² / 2 - x·c_k), que omite ||x||² (no cambia el argmin).
+    Con dtype=None se usa el dtype de los centroides (float64 en sklearn) y
+    las etiquetas coinciden con predict; float32 es más rápido con muchos
+    centroides pero puede cambiar empates muy ajustados.
+    """
+
+    __slots__ = ('centroids', 'half_norms')
+
+    def __init__(self, centroids, dtype=None):
+        centroids = np.asarray(centroids)
+        if dtype is not None:
+            centroids = centroids.astype(dtype)
+        self.centroids = np.ascontiguousarray(centroids)
+        self.half_norms = 0.5 * np.einsum('ij,ij->i', self.centroids, self.centroids)
+
+    @classmethod
+    def from_kmeans(cls, km, dtype=None):
+        return cls(km.cluster_centers_, dtype=dtype)
+
+    @property
+    def n_clusters(self):
+        return len(self.centroids)
+
+    def assign(self, feats):
+        """Bucket (int) de un único vector de features."""
+        x = np.asarray(feats, dtype=self.centroids.dtype)
+        return int(np.argmin(self.half_norms - self.centroids @ x))
+
+    def predict(self, X):
+        """Buckets de una matriz (N, F); misma interfaz que KMeans.predict."""
+        X = np.asarray(X, dtype=self.centroids.dtype).reshape(-1, self.centroids.shape[1])
+        return np.argmin(self.half_norms - X @ self.centroids.T, axis=1)
+
+
+def as_assigner(model, dtype=None):
+    """BucketAssigner de un KMeans ajustado (o el mismo objeto si ya lo es)."""
+    if model is None or isinstance(model, BucketAssigner):
+        return model
+    return BucketAssigner.from_kmeans(model, dtype=dtype)
+
+
+# ------------------------------------------
+# Tablas de buckets de cartas (preflop y flop)
+# ------------------------------------------
+BUCKET_TABLE_DIR = os.path.dirname(os.path.abspath(__file__))
+TABLE_PHASES = ('preflop', 'flop')
+BUCKET_TABLE_FILES = {
+    'preflop': ('bucket_preflop.npy',),
+    'flop': ('bucket_flop_keys.npy', 'bucket_flop.npy'),
+}
+
+# Contexto de referencia: el mismo de las muestras de clustering de train_phase
+_REF_POT, _REF_HISTORY, _REF_TO_ACT = 10, '', 0
+
+# Permutaciones de palos como tablas carta -> carta
+_SUIT_PERMUTATIONS = np.array(
+    [[perm[c // 13] * 13 + c % 13 for c in range(52)] for perm in permutations(range(4))],
+    dtype=np.int64
+)
+_SUIT_PERMUTATION_LISTS = _SUIT_PERMUTATIONS.tolist()
+
+
+def flop_situation_key(hole, flop):
+    """
+    Clave isomorfa por palos de hole + flop: el mínimo, sobre las 24
+    permutaciones de palos, de (flop ordenado, hole ordenado) en base 52.
+    """
+    best = None
+    for p in _SUIT_PERMUTATION_LISTS:
+        f0, f1, f2 = sorted((p[flop[0]], p[flop[1]], p[flop[2]]))
+        h0, h1 = p[hole[0]], p[hole[1]]
+        if h0 > h1:
+            h0, h1 = h1, h0
+        key = ((f0 * 52 + f1) * 52 + f2) * 2704 + h0 * 52 + h1
+        if best is None or key < best:
+            best = key
+    return best
+
+
+def batch_flop_situation_keys(cards):
+    """flop_situation_key de un array (N, 5) con las columnas hole, hole, flop x 3."""
+    cards = np.asarray(cards, dtype=np.int64)
+    best = None
+    for perm in _SUIT_PERMUTATIONS:
+        mapped = perm[cards]
+        h = np.sort(mapped[:, :2], axis=1)
+        f = np.sort(mapped[:, 2:], axis=1)
+        key = ((f[:, 0] * 52 + f[:, 1]) * 52 + f[:, 2]) * 2704 + h[:, 0] * 52 + h[:, 1]
+        best = key if best is None else np.minimum(best, key)
+    return best
+
+
+def decode_flop_situation_key(key):
+    """(hole, flop) representativos de una clave."""
+    key, hole = divmod(int(key), 2704)
+    key, f2 = divmod(key, 52)
+    f0, f1 = divmod(key, 52)
+    return divmod(hole, 52), (f0, f1, f2)
+
+
+def canonical_flop_situations():
+    """
+    Claves ordenadas de todas las clases hole + flop. Toda clase tiene un
+    miembro con el flop en forma canónica, así que basta con recorrer los
+    flops canónicos y todos los holes compatibles.
+    """
+    flops = sorted(set(canonical_board(f) for f in combinations(range(52), 3)))
+    keys = []
+    for flop in flops:
+        rest = [c for c in range(52) if c not in flop]
+        holes = np.array(list(combinations(rest, 2)), dtype=np.int64)
+        cards = np.hstack([holes, np.broadcast_to(np.array(flop), (len(holes), 3))])
+        keys.append(batch_flop_situation_keys(cards))
+    return np.unique(np.concatenate(keys))
+
+
+def compute_bucket_table(phase, assigner, num_sim=20, seed=0, chunk=50000, logger=None):
+    """
+    Bucket del representativo de cada clase de cartas de la fase, en el
+    contexto de referencia: preflop -> (None, buckets (169,) uint16); flop ->
+    (claves uint32 ordenadas, buckets uint16). El EHS del flop usa un rng con
+    semilla fija, así que el mismo modelo da siempre la misma tabla.
+    """
+    # Import diferido: bucket_features -> poker_env -> bucketing
+    from bucket_features import hand_to_features_batch
+
+    if assigner.n_clusters > np.iinfo(np.uint16).max + 1:
+        raise ValueError(f"{assigner.n_clusters} clusters no caben en uint16")
+    rng = np.random.default_rng(seed)
+
+    if phase == 'preflop':
+        keys = None
+        n = NUM_CLASSES
+    elif phase == 'flop':
+        keys = canonical_flop_situations()
+        n = len(keys)
+    else:
+        raise ValueError(f"No hay tabla de buckets para la fase {phase!r}")
+
+    buckets = np.empty(n, dtype=np.uint16)
+    for start in range(0, n, chunk):
+        if keys is None:
+            holes = [class_representative(cls) for cls in range(start, min(start + chunk, n))]
+            boards = [[] for _ in holes]
+        else:
+            flop_codes, hole_codes = np.divmod(keys[start:start + chunk].astype(np.int64), 2704)
+            holes = np.stack(np.divmod(hole_codes, 52), axis=1).tolist()
+            boards = np.stack(
+                [flop_codes // 2704, flop_codes // 52 % 52, flop_codes % 52], axis=1
+            ).tolist()
+        X = hand_to_features_batch(
+            holes,
+            boards,
+            pots=_REF_POT,
+            histories=_REF_HISTORY,
+            to_acts=_REF_TO_ACT,
+            ehs=batch_equity(holes, boards, num_sim=num_sim, rng=rng, cache=None)
+        )
+        buckets[start:start + chunk] = assigner.predict(X)
+        if logger is not None:
+            logger(f"[Buckets] {phase}: {min(start + chunk, n)}/{n} situaciones")
+    return (None if keys is None else keys.astype(np.uint32)), buckets
+
+
+def table_checksum(buckets):
+    """CRC32 de una tabla de buckets: identifica la tabla con la que se entrenó."""
+    return zlib.crc32(np.ascontiguousarray(buckets, dtype=np.uint16).tobytes())
+
+
+def save_bucket_table(phase, keys, buckets, directory=BUCKET_TABLE_DIR):
+    """Guarda la tabla de la fase en directory (escritura atómica por fichero)."""
+    names = BUCKET_TABLE_FILES[phase]
+    arrays = (buckets,) if keys is None else (keys, buckets)
+    for name, array in zip(names, arrays):
+        _save_atomic(os.path.join(directory, name), array)
+
+
+class BucketTables:
+    """
+    Buckets tabulados de la parte de cartas (mapeados en memoria): preflop
+    indexado por hand_class (169) y flop por clave isomorfa (array ordenado
+    de claves + array uint16 de buckets). Con CFRTrainer(use_bucket_tables=True)
+    son la abstracción de cartas de esas calles, tanto al entrenar como al
+    jugar: el bucket es el del representativo de la clase en el contexto de
+    referencia, sin pot, raises, turno ni palos concretos.
+    """
+
+    __slots__ = ('preflop', 'flop_keys', 'flop')
+
+    def __init__(self, preflop=None, flop_keys=None, flop=None):
+        self.preflop = preflop
+        self.flop_keys = flop_keys
+        self.flop = flop
+
+    @classmethod
+    def load(cls, directory=BUCKET_TABLE_DIR, phases=TABLE_PHASES):
+        """Tablas de las fases pedidas; FileNotFoundError si falta alguna."""
+        tables = cls()
+        for phase in phases:
+            arrays = [
+                np.load(os.path.join(directory, name), mmap_mode='r')
+                for name in BUCKET_TABLE_FILES[phase]
+            ]
+            if phase == 'preflop':
+                tables.preflop, = arrays
+            else:
+                tables.flop_keys, tables.flop = arrays
+        return tables
+
+    def table(self, phase):
+        """Array de buckets de la fase (None si no está cargada)."""
+        return self.preflop if phase == 'preflop' else self.flop
+
+    def lookup(self, hole, board):
+        """Bucket tabulado de (hole, board); None si la calle no está tabulada."""
+        if not board:
+            if self.preflop is None:
+                return None
+            return int(self.preflop[hand_class(hole[0], hole[1])])
+        if len(board) != 3 or self.flop is None:
+            return None
+        key = flop_situation_key(hole, board)
+        i = int(np.searchsorted(self.flop_keys, np.uint32(key)))
+        if i == len(self.flop_keys) or self.flop_keys[i] != key:
+            return None
+        return int(self.flop[i])
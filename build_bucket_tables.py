@@ -0,0 +1,45 @@
+# build_bucket_tables.py
+# Regenera las tablas de buckets (uint16) de un modelo entrenado con
+# CFRTrainer(use_bucket_tables=True): 169 clases preflop y todas las
+# situaciones hole + flop isomorfas por palos. train_phase ya las genera al
+# entrenar; este script las reconstruye (son deterministas) si se han perdido
+# o si el modelo se mueve a otra máquina, y comprueba que coinciden con las
+# del entrenamiento.
+# Uso: python build_bucket_tables.py [modelo.pkl] [directorio]
+
+import os
+import pickle
+import sys
+
+from bucketing import compute_bucket_table, save_bucket_table, table_checksum
+
+
+def build_bucket_tables(trainer, directory=None):
+    """
+    Reconstruye en directory (por defecto trainer.bucket_table_dir) las
+    tablas de las fases entrenadas con tablas y verifica su checksum.
+    """
+    directory = directory or trainer.bucket_table_dir
+    for phase, checksum in trainer.bucket_table_checksums.items():
+        keys, buckets = compute_bucket_table(phase, trainer.bucket_assigner(phase), logger=print)
+        if table_checksum(buckets) != checksum:
+            raise RuntimeError(f"La tabla {phase} no coincide con la del entrenamiento")
+        save_bucket_table(phase, keys, buckets, directory)
+        print(f"[Buckets] {phase}: tabla verificada y guardada en {directory}")
+
+
+if __name__ == '__main__':
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'cfr_entreno.pkl'
+    with open(model_path, 'rb') as f:
+        trainer = pickle.load(f)
+    if not trainer.use_bucket_tables:
+        sys.exit(f"{model_path} no se entrenó con use_bucket_tables")
+
+    directory = os.path.abspath(sys.argv[2]) if len(sys.argv) > 2 else trainer.bucket_table_dir
+    build_bucket_tables(trainer, directory)
+    if directory != trainer.bucket_table_dir:
+        # El modelo pasa a buscar sus tablas en el nuevo directorio
+        trainer.bucket_table_dir = directory
+        with open(model_path, 'wb') as f:
+            pickle.dump(trainer, f)
+        print(f"{model_path} actualizado: tablas en {directory}")
@@ -0,0 +1,14 @@
+# build_hand_tables.py
+# Generador offline de las tablas del evaluador: tablas base (claves sin
+# color, color, desglose por categoría; van en el repositorio) y tabla densa
+# de 7 cartas hand_rank7.npy (~15 MB, no versionada; opcional).
+# Uso: python build_hand_tables.py
+
+from hand_evaluator import RANK_TABLE_FILE, _TABLE_DIR, build_hand_tables, build_rank_table
+
+
+if __name__ == '__main__':
+    build_hand_tables()
+    print(f"Tablas base guardadas en {_TABLE_DIR}")
+    build_rank_table()
+    print(f"Tabla densa de 7 cartas guardada en {RANK_TABLE_FILE}")
@@ -0,0 +1,106 @@
+# build_preflop_table.py
+# Generador offline de la tabla de equity preflop (169 clases x perfil) y de
+# la matriz clase contra clase (169 x 169).
+# Uso: python build_preflop_table.py [num_sim]
+#      python build_preflop_table.py matrix [num_sim]
+
+import sys
+import numpy as np
+
+from equity_engine import (
+    _COMBOS,
+    _CLASS_COMBOS,
+    _deal_runouts,
+    NUM_CLASSES,
+    PREFLOP_MATRIX_FILE,
+    PREFLOP_TABLE_FILE,
+    class_representative,
+    monte_carlo_equity
+)
+from hand_evaluator import evaluate_batch
+
+PROFILES = ("tight", "balanced", "loose")
+
+
+def build_preflop_table(num_sim=200000, chunk=50000, path=PREFLOP_TABLE_FILE, seed=42):
+    """
+    Calcula la equity de una combo representativa de cada clase contra cada
+    perfil (los perfiles son simétricos por palo, así que cualquier combo de
+    la clase da el mismo valor) y la guarda en path.
+    """
+    rng = np.random.default_rng(seed)
+    tables = {}
+    for profile in PROFILES:
+        table = np.zeros(NUM_CLASSES)
+        for cls in range(NUM_CLASSES):
+            hole = list(class_representative(cls))
+            done, total = 0, 0.0
+            while done < num_sim:
+                n = min(chunk, num_sim - done)
+                total += monte_carlo_equity(hole, [], num_sim=n, profile=profile, rng=rng) * n
+                done += n
+            table[cls] = total / num_sim
+        tables[profile] = table
+        print(f"[Preflop] Perfil '{profile}' completado.")
+
+    np.savez(path, num_sim=num_sim, **tables)
+    print(f"Tabla preflop guardada en {path}")
+    return tables
+
+
+def _compatible_pairs(ci, cj):
+    """Pares (combo de ci, combo de cj) sin cartas en común, como array (P, 4)."""
+    a = _COMBOS[ci][:, None, :]
+    b = _COMBOS[cj][None, :, :]
+    disjoint = ~(a[..., :, None] == b[..., None, :]).any(axis=(2, 3))
+    ia, ib = np.nonzero(disjoint)
+    return np.hstack([_COMBOS[ci][ia], _COMBOS[cj][ib]])
+
+
+def build_preflop_matrix(num_sim=5000, cells_per_batch=100, path=PREFLOP_MATRIX_FILE, seed=42):
+    """
+    Equity de cada clase contra cada clase, promediada sobre los pares de
+    combos compatibles (num_sim simulaciones por celda con par y board al
+    azar), junto con el número de esos pares. Se calcula la mitad superior y
+    el resto por simetría (E[j, i] = 1 - E[i, j]; la diagonal es 0.5).
+    Guarda un array float32 (2, 169, 169) en path.
+    """
+    rng = np.random.default_rng(seed)
+    deck = np.arange(52, dtype=np.int64)
+    matrix = np.zeros((2, NUM_CLASSES, NUM_CLASSES), dtype=np.float32)
+
+    cells = [(i, j) for i in range(NUM_CLASSES) for j in range(i, NUM_CLASSES)]
+    for start in range(0, len(cells), cells_per_batch):
+        batch = cells[start:start + cells_per_batch]
+        deals, owners = [], []
+        for k, (i, j) in enumerate(batch):
+            pairs = _compatible_pairs(_CLASS_COMBOS[i], _CLASS_COMBOS[j])
+            matrix[1, i, j] = matrix[1, j, i] = len(pairs)
+            if i != j:
+                deals.append(pairs[rng.integers(len(pairs), size=num_sim)])
+                owners.append(np.full(num_sim, k))
+        if deals:
+            deals, owners = np.vstack(deals), np.concatenate(owners)
+            board = _deal_runouts(deck, deals, 5, rng)
+            hero = evaluate_batch(np.hstack([deals[:, :2], board]))
+            opp = evaluate_batch(np.hstack([deals[:, 2:], board]))
+            outcome = np.where(hero < opp, 1.0, np.where(hero == opp, 0.5, 0.0))
+            means = np.bincount(owners, weights=outcome, minlength=len(batch)) / num_sim
+        for k, (i, j) in enumerate(batch):
+            if i == j:
+                matrix[0, i, i] = 0.5
+            else:
+                matrix[0, i, j] = means[k]
+                matrix[0, j, i] = 1.0 - means[k]
+        print(f"[Matriz] {min(start + cells_per_batch, len(cells))}/{len(cells)} celdas")
+
+    np.save(path, matrix)
+    print(f"Matriz preflop guardada en {path}")
+    return matrix
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'matrix':
+        build_preflop_matrix(num_sim=int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
+    else:
+        build_preflop_table(num_sim=int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
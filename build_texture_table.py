@@ -0,0 +1,57 @@
+# build_texture_table.py
+# Generador offline de la tabla de texturas de flops y turns (isomorfa por palos).
+# Uso: python build_texture_table.py
+
+from itertools import combinations
+from math import comb
+import numpy as np
+
+from board_texture import (
+    TEXTURE_TABLE_FILE,
+    TEXTURES,
+    board_index,
+    canonical_board,
+    compute_straight_potential,
+    compute_suit_pattern,
+    compute_texture
+)
+
+
+def _build_street(n):
+    """
+    Recorre los C(52, n) boards, agrupa por clase canónica y calcula las
+    propiedades una sola vez por clase.
+    """
+    board_class = np.zeros(comb(52, n), dtype=np.uint16)
+    class_ids = {}
+    for board in combinations(range(52), n):
+        canon = canonical_board(board)
+        board_class[board_index(board)] = class_ids.setdefault(canon, len(class_ids))
+
+    classes = list(class_ids)
+    fields = {
+        'class': board_class,
+        'suit_pattern': np.array([compute_suit_pattern(b) for b in classes], dtype=np.uint8),
+        'straight_potential': np.array([compute_straight_potential(b) for b in classes], dtype=np.uint8),
+    }
+    if n == 3:
+        fields['texture'] = np.array(
+            [TEXTURES.index(compute_texture(b)) for b in classes], dtype=np.uint8
+        )
+    return fields, len(classes)
+
+
+def build_texture_table(path=TEXTURE_TABLE_FILE):
+    tables = {}
+    for n, street in ((3, 'flop'), (4, 'turn')):
+        fields, n_classes = _build_street(n)
+        tables.update({f'{street}_{name}': arr for name, arr in fields.items()})
+        print(f"[Texturas] {street}: {comb(52, n)} boards, {n_classes} clases.")
+
+    np.savez_compressed(path, **tables)
+    print(f"Tabla de texturas guardada en {path}")
+    return tables
+
+
+if __name__ == '__main__':
+    build_texture_table()
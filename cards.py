@@ -0,0 +1,92 @@
+# cards.py
+# Representación compacta de cartas: un entero 0..51 = suit * 13 + (rank - 2)
+#   rank: 2..14 (14 = As)    suit: 0=spades, 1=hearts, 2=diamonds, 3=clubs
+# Las cadenas ('As', 'QC') y las tuplas (rank, suit) solo se usan en la frontera
+# con la UI/Flask, los logs y el código antiguo.
+
+NUM_CARDS = 52
+RANK_CHARS = "23456789TJQKA"
+SUIT_CHARS = "shdc"
+
+_RANK_FROM_CHAR = {ch: i + 2 for i, ch in enumerate(RANK_CHARS)}
+_SUIT_FROM_CHAR = {ch: i for i, ch in enumerate(SUIT_CHARS)}
+_SUIT_FROM_CHAR.update({ch.upper(): i for i, ch in enumerate(SUIT_CHARS)})
+
+
+def make_card(rank, suit):
+    return suit * 13 + (rank - 2)
+
+
+def rank_of(card):
+    """Rank 2..14 de una carta entera."""
+    return card % 13 + 2
+
+
+def suit_of(card):
+    """Palo 0..3 de una carta entera."""
+    return card // 13
+
+
+def to_tuple(card):
+    return (card % 13 + 2, card // 13)
+
+
+def to_index(card):
+    """
+    Normaliza cualquier representación (entero, tupla (rank, suit) o cadena
+    'As'/'AS') al entero 0..51.
+    """
+    if isinstance(card, str):
+        return make_card(_RANK_FROM_CHAR[card[0].upper()], _SUIT_FROM_CHAR[card[1]])
+    if isinstance(card, tuple):
+        return make_card(card[0], card[1])
+    return int(card)
+
+
+def to_indices(cards):
+    return [to_index(c) for c in cards]
+
+
+def to_str(card):
+    """Cadena estilo treys: 'As', 'Td'..."""
+    return RANK_CHARS[card % 13] + SUIT_CHARS[card // 13]
+
+
+def to_ui(card):
+    """Cadena de la interfaz web y los logs: 'AS', 'QC'... (nombre de la imagen)."""
+    return RANK_CHARS[card % 13] + SUIT_CHARS[card // 13].upper()
+
+
+def cards_to_ui(cards):
+    return [to_ui(c) for c in cards]
+
+
+# ------------------------------------------
+# Máscaras de bits
+# ------------------------------------------
+def card_mask(cards):
+    """Máscara de 52 bits con las cartas dadas."""
+    mask = 0
+    for c in cards:
+        mask |= 1 << c
+    return mask
+
+
+def mask_to_cards(mask):
+    return [c for c in range(NUM_CARDS) if mask >> c & 1]
+
+
+def rank_mask(cards):
+    """Máscara de 13 bits con los ranks presentes (bit 0 = '2', bit 12 = 'A')."""
+    mask = 0
+    for c in cards:
+        mask |= 1 << (c % 13)
+    return mask
+
+
+def suit_rank_masks(cards):
+    """Lista de 4 máscaras de ranks, una por palo."""
+    masks = [0, 0, 0, 0]
+    for c in cards:
+        masks[c // 13] |= 1 << (c % 13)
+    return masks
@@ -2,7 +2,7 @@
 
 import numpy as np
 import random
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 
 from poker_env import (
     create_deck,
@@ -12,10 +12,21 @@ from poker_env import (
 )
 
 from bucket_features import (
+    hand_to_features_batch,
     hand_to_features_enhanced,
     real_equity_estimate
 )
 from heuristics_warmup import heuristic_action
+from equity_engine import EQUITY_CACHE, POTENTIAL_CACHE, LRUCache, hand_potential
+from bucketing import (
+    BUCKET_TABLE_DIR,
+    TABLE_PHASES,
+    BucketAssigner,
+    BucketTables,
+    compute_bucket_table,
+    save_bucket_table,
+    table_checksum
+)
 
 NUM_ACTIONS = len(Action)
 
@@ -51,13 +62,26 @@ class Node:
         return np.ones(self.num_actions) / self.num_actions
 
 
+# Métodos de clustering de train_phase
+CLUSTERING_METHODS = ('kmeans', 'minibatch')
+
+
 class CFRTrainer:
     def __init__(
         self,
         iterations_map=None,
         samples_map=None,
         depth=15,
-        epsilon_map=None
+        epsilon_map=None,
+        potential_features=False,
+        potential_runouts=64,
+        bucket_cache_size=200000,
+        clustering='kmeans',
+        minibatch_size=4096,
+        cluster_tol=1e-4,
+        clusters_map=None,
+        use_bucket_tables=False,
+        bucket_table_dir=BUCKET_TABLE_DIR
     ):
         # Número de iteraciones por fase
         self.iterations_map = iterations_map or {
@@ -82,10 +106,55 @@ class CFRTrainer:
             'river':  0.02
         }
 
-        # Almacenarán KMeans y nodos por fase
+        # Clustering de train_phase: 'kmeans' (todas las muestras a la vez,
+        # samples_map // 10 clusters) o 'minibatch' (clusters_map clusters,
+        # bloques de minibatch_size muestras generados sobre la marcha, en
+        # float32, hasta agotar samples_map o hasta que los centroides se
+        # muevan menos que cluster_tol en términos relativos)
+        if clustering not in CLUSTERING_METHODS:
+            raise ValueError(f"clustering debe ser uno de {CLUSTERING_METHODS}, no {clustering!r}")
+        self.clustering = clustering
+        self.minibatch_size = minibatch_size
+        self.cluster_tol = cluster_tol
+        # Número de clusters por fase en modo 'minibatch': fijo, no depende
+        # de cuántas muestras se lleguen a generar
+        self.clusters_map = clusters_map or {
+            'preflop': 2000,
+            'flop':   1000,
+            'turn':   2000,
+            'river':  1000
+        }
+
+        # Features opcionales de potencial de mano (PPot, NPot, EHS²), con
+        # potential_runouts runouts muestreados por estado en el flop
+        self.potential_features = potential_features
+        self.potential_runouts = potential_runouts
+
+        # Abstracción de cartas tabulada en preflop y flop: train_phase genera
+        # la tabla de la fase tras el clustering (en bucket_table_dir) y tanto
+        # el entrenamiento como el bot la usan; turn y river siguen en línea.
+        # Las features de potencial harían inviable tabular el flop.
+        if use_bucket_tables and potential_features:
+            raise ValueError("use_bucket_tables no admite potential_features")
+        self.use_bucket_tables = use_bucket_tables
+        self.bucket_table_dir = bucket_table_dir
+        # CRC32 de cada tabla generada: al cargar se comprueba que los
+        # ficheros son los de este modelo
+        self.bucket_table_checksums = {}
+
+        # Almacenarán KMeans, sus asignadores NumPy y nodos por fase
         self.kmeans_models = {}
+        self.assigners = {}
         self.nodes = {}
 
+        # Buckets ya calculados por estado (fase, cartas, pot, raises, turno),
+        # compartida entre entrenamiento y bot
+        self.bucket_cache_size = bucket_cache_size
+        self.bucket_cache = LRUCache(maxsize=bucket_cache_size)
+
+        # Tablas mapeadas en memoria; se cargan en el primer bucket()
+        self.bucket_tables = None
+
         # Estadísticas fold-equity empírica: fase -> {'RS': [int attempts, int folds], 'RM': [...]}
         self.fold_stats = {
             'preflop': {'RS': [1, 1], 'RM': [1, 1]},
@@ -94,6 +163,36 @@ class CFRTrainer:
             'river':   {'RS': [1, 1], 'RM': [1, 1]},
         }
 
+    # Atributos añadidos después de los primeros modelos guardados: los
+    # entrenadores antiguos (p. ej. cfr_entreno.pkl) los reciben con estos valores
+    _STATE_DEFAULTS = {
+        'potential_features': False,
+        'potential_runouts': 64,
+        'bucket_cache_size': 200000,
+        'clustering': 'kmeans',
+        'minibatch_size': 4096,
+        'cluster_tol': 1e-4,
+        'clusters_map': {'preflop': 2000, 'flop': 1000, 'turn': 2000, 'river': 1000},
+        'use_bucket_tables': False,
+        'bucket_table_dir': BUCKET_TABLE_DIR,
+        'bucket_table_checksums': {},
+    }
+
+    def __getstate__(self):
+        # Ni la caché de buckets ni las tablas mapeadas se guardan con el modelo
+        state = self.__dict__.copy()
+        state.pop('bucket_cache', None)
+        state.pop('bucket_tables', None)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in self._STATE_DEFAULTS.items():
+            state.setdefault(name, value.copy() if isinstance(value, dict) else value)
+        state.setdefault('assigners', {})
+        self.__dict__.update(state)
+        self.bucket_cache = LRUCache(maxsize=self.bucket_cache_size)
+        self.bucket_tables = None
+
     @staticmethod
     def _deal(deck, phase):
         """
@@ -111,7 +210,7 @@ class CFRTrainer:
             return deck[4:8]
         return deck[4:9]
 
-    def prefill_regrets(self, phase, km: KMeans, num_sims=10000, epsilon=0.01):
+    def prefill_regrets(self, phase, num_sims=10000, epsilon=0.01):
         """
         Warm-up con heurísticas:
           - Simula num_sims veces estados aleatorios.
@@ -162,14 +261,15 @@ class CFRTrainer:
                 # --- REEMPLAZO de get_bucket por hand_to_features_enhanced --- #
                 hole = gs.hole_cards[gs.to_act]
                 community_now = gs.community_cards
-                feats = hand_to_features_enhanced(
+                bucket = self.bucket(
+                    phase,
                     hole,
                     community_now,
                     pot=gs.pot,
                     history=gs.history,
-                    to_act=gs.to_act
+                    to_act=gs.to_act,
+                    hand_state=gs.hand_states[gs.to_act]
                 )
-                bucket = km.predict(feats.reshape(1, -1))[0]
                 infoset = f"{phase}|{bucket}|{gs.history}"
                 # ------------------------------------------------------------- #
 
@@ -245,7 +345,7 @@ class CFRTrainer:
         print(f"[Warm-up] Prefill completo en fase '{phase}'. Nodos iniciales: {len(self.nodes[phase])}")
 
 
-    def sample_trajectory(self, phase, km, iter_count, total_iters):
+    def sample_trajectory(self, phase, iter_count, total_iters):
         """
         MCCFR por outcome sampling:
           - Se muestrea una sola trayectoria (chance + acciones).
@@ -280,14 +380,15 @@ class CFRTrainer:
             # --- REEMPLAZO de get_bucket por hand_to_features_enhanced --- #
             hole = gs.hole_cards[gs.to_act]
             community_now = gs.community_cards
-            feats = hand_to_features_enhanced(
+            bucket = self.bucket(
+                phase,
                 hole,
                 community_now,
                 pot=gs.pot,
                 history=gs.history,
-                to_act=gs.to_act
+                to_act=gs.to_act,
+                hand_state=gs.hand_states[gs.to_act]
             )
-            bucket = km.predict(feats.reshape(1, -1))[0]
             infoset = f"{phase}|{bucket}|{gs.history}"
             if infoset not in self.nodes[phase]:
                 self.nodes[phase][infoset] = Node(infoset)
@@ -330,11 +431,162 @@ class CFRTrainer:
         return util_norm_p0
 
 
-    def train_phase(self, phase, st_logger=print):
+    def bucket_assigner(self, phase):
+        """
+        BucketAssigner de la fase (None si no hay modelo), construido desde
+        kmeans_models en el primer uso.
+        """
+        if phase not in self.assigners:
+            km = self.kmeans_models.get(phase)
+            if km is None:
+                return None
+            self.assigners[phase] = BucketAssigner.from_kmeans(km)
+        return self.assigners[phase]
+
+    def bucket(self, phase, hole, community, pot, history, to_act, hand_state=None):
+        """
+        Bucket del estado con la caché bucket_cache. La clave usa las cartas
+        exactas (no una forma canónica por palos) porque las features incluyen
+        el rank y el palo de cada carta en su posición; del historial solo
+        entra el número de raises, igual que en las features.
+        Con use_bucket_tables, en preflop y flop el bucket es el tabulado.
+        """
+        if self.use_bucket_tables and phase in TABLE_PHASES:
+            if self.bucket_tables is None:
+                self.bucket_tables = self._load_bucket_tables()
+            bucket = self.bucket_tables.lookup(hole, community)
+            if bucket is not None:
+                return bucket
+
+        key = (phase, tuple(hole), tuple(community), pot, history.count('r'), to_act)
+        bucket = self.bucket_cache.get(key)
+        if bucket is None:
+            feats = hand_to_features_enhanced(
+                hole,
+                community,
+                pot=pot,
+                history=history,
+                to_act=to_act,
+                hand_state=hand_state,
+                potential=self._potential(hole, community)
+            )
+            bucket = self.bucket_assigner(phase).assign(feats)
+            self.bucket_cache.put(key, bucket)
+        return bucket
+
+    def _load_bucket_tables(self):
+        """
+        Tablas de las fases ya entrenadas, mapeadas en memoria desde
+        bucket_table_dir; RuntimeError si faltan o no son las de este modelo
+        (los nodos se entrenaron con esos buckets).
+        """
+        phases = list(self.bucket_table_checksums)
+        try:
+            tables = BucketTables.load(self.bucket_table_dir, phases)
+        except (OSError, ValueError) as exc:
+            raise RuntimeError(
+                f"Faltan las tablas de buckets en {self.bucket_table_dir}: "
+                "regenéralas con build_bucket_tables.py"
+            ) from exc
+        for phase in phases:
+            if table_checksum(tables.table(phase)) != self.bucket_table_checksums[phase]:
+                raise RuntimeError(
+                    f"La tabla de buckets {phase} de {self.bucket_table_dir} no es la "
+                    "de este modelo: regenérala con build_bucket_tables.py"
+                )
+        return tables
+
+    def build_bucket_table(self, phase, st_logger=print):
+        """
+        Tabula los buckets de cartas de la fase con su modelo actual, los
+        guarda en bucket_table_dir y apunta su checksum. La tabla es
+        determinista: repetirlo con el mismo modelo reproduce los ficheros.
+        """
+        keys, buckets = compute_bucket_table(phase, self.bucket_assigner(phase), logger=st_logger)
+        save_bucket_table(phase, keys, buckets, self.bucket_table_dir)
+        self.bucket_table_checksums[phase] = table_checksum(buckets)
+        self.bucket_tables = None
+
+    def _potential(self, hole, community):
+        """hand_potential del estado si el entrenador usa esas features; si no, None."""
+        if not self.potential_features:
+            return None
+        return hand_potential(hole, community, num_runouts=self.potential_runouts)
+
+    def _cluster_samples(self, phase, n, equity_service=None):
+        """Matriz de features (n, F) de n repartos al azar de la fase (pot 10, sin historial)."""
+        deals = []
+        for _ in range(n):
+            deck = create_deck()
+            random.shuffle(deck)
+            deals.append((deck[:2], self._deal(deck, phase)))
+
+        if equity_service is not None:
+            ehs_list = equity_service.map(
+                [(hole, comm, "balanced", 20) for hole, comm in deals]
+            )
+        else:
+            ehs_list = None
+
+        if not self.potential_features:
+            pot_list = None
+        elif equity_service is not None:
+            pot_list = equity_service.potentials(
+                [(hole, comm, "balanced", self.potential_runouts) for hole, comm in deals]
+            )
+        else:
+            pot_list = [self._potential(hole, comm) for hole, comm in deals]
+
+        # Matriz de muestras en una sola pasada (EHS por lotes si no hay servicio)
+        return hand_to_features_batch(
+            [hole for hole, _ in deals],
+            [comm for _, comm in deals],
+            pots=10,
+            histories='',
+            to_acts=0,
+            ehs=ehs_list,
+            potentials=pot_list
+        )
+
+    def _fit_minibatch(self, phase, n_samp, equity_service=None, st_logger=print):
+        """
+        MiniBatchKMeans de clusters_map[phase] clusters con partial_fit sobre
+        bloques de minibatch_size muestras generados sobre la marcha: nunca hay
+        más de un bloque en memoria. Para antes de n_samp muestras si el
+        desplazamiento relativo de los centroides entre bloques baja de
+        cluster_tol.
         """
-        1) Clustering con features enriquecidos.
+        n_clusters = self.clusters_map[phase]
+        if n_clusters > n_samp:
+            raise ValueError(
+                f"clusters_map['{phase}']={n_clusters} supera las {n_samp} muestras de samples_map"
+            )
+        batch = self.minibatch_size
+        km = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch, random_state=42)
+
+        seen, centers = 0, None
+        while seen < n_samp:
+            # El primer bloque inicializa los centroides: necesita >= n_clusters muestras
+            size = batch if seen else max(batch, n_clusters)
+            X = self._cluster_samples(phase, min(size, n_samp - seen), equity_service)
+            km.partial_fit(X.astype(np.float32))
+            seen += len(X)
+            if centers is not None:
+                shift = np.linalg.norm(km.cluster_centers_ - centers) / (np.linalg.norm(centers) + 1e-12)
+                st_logger(f"[MiniBatch] {seen}/{n_samp} muestras, desplazamiento={shift:.2e}")
+                if shift < self.cluster_tol:
+                    break
+            centers = km.cluster_centers_.copy()
+        return km
+
+    def train_phase(self, phase, st_logger=print, equity_service=None):
+        """
+        1) Clustering con features enriquecidos (KMeans o MiniBatchKMeans según clustering).
         2) Warm-up con heurísticas mejoradas (equity real).
         3) MCCFR outcome sampling con payoffs normalizados.
+        equity_service: EquityService opcional para calcular en paralelo el
+        EHS (y el potencial, si potential_features) de todas las muestras de
+        clustering.
         """
         st_logger(f"--- Entrenando {phase} con MCCFR (payoff normalizado) ---")
 
@@ -343,31 +595,30 @@ class CFRTrainer:
         eps0    = self.epsilon_map[phase]
 
         # 1) Clustering KMeans sobre hand_to_features_enhanced
-        samples = []
-        for _ in range(n_samp):
-            deck = create_deck()
-            random.shuffle(deck)
-            hole = deck[:2]
-            comm = self._deal(deck, phase)
-            feats = hand_to_features_enhanced(
-                hole,
-                comm,
-                pot=10,
-                history='',
-                to_act=0
-            )
-            samples.append(feats)
-        X = np.array(samples)
-        km = KMeans(n_clusters=max(2, n_samp // 10), random_state=42).fit(X)
+        if self.clustering == 'minibatch':
+            km = self._fit_minibatch(phase, n_samp, equity_service, st_logger)
+        elif self.clustering == 'kmeans':
+            X = self._cluster_samples(phase, n_samp, equity_service)
+            km = KMeans(n_clusters=max(2, n_samp // 10), random_state=42).fit(X)
+        else:
+            raise ValueError(f"clustering debe ser uno de {CLUSTERING_METHODS}, no {self.clustering!r}")
         self.kmeans_models[phase] = km
+        # El asignador, los buckets guardados y las tablas dejan de valer con
+        # el nuevo modelo (el asignador se reconstruye en el primer bucket() y
+        # la tabla de la fase se regenera antes del warm-up)
+        self.assigners.pop(phase, None)
+        self.bucket_cache.clear()
+        self.bucket_tables = None
+        if self.use_bucket_tables and phase in TABLE_PHASES:
+            self.build_bucket_table(phase, st_logger)
 
         # 2) Warm-up
-        self.prefill_regrets(phase, km=km, num_sims=n_samp, epsilon=eps0)
+        self.prefill_regrets(phase, num_sims=n_samp, epsilon=eps0)
 
         # 3) MCCFR (outcome sampling)
         utils_block = []
         for i in range(1, iters + 1):
-            util = self.sample_trajectory(phase, km, i, iters)
+            util = self.sample_trajectory(phase, i, iters)
             utils_block.append(util)
 
             if i % 500 == 0:
@@ -396,3 +647,22 @@ class CFRTrainer:
         )
         avg_regret_final = total_pos / iters
         st_logger(f"*** Average positive regret en {phase}: {avg_regret_final:.6f} ***")
+
+        cs = EQUITY_CACHE.stats()
+        st_logger(
+            f"[Equity cache] hits={cs['hits']}, misses={cs['misses']}, "
+            f"evictions={cs['evictions']}, size={cs['size']}/{cs['maxsize']}, "
+            f"hit_rate={cs['hit_rate']:.2%}"
+        )
+        bs = self.bucket_cache.stats()
+        st_logger(
+            f"[Bucket cache] hits={bs['hits']}, misses={bs['misses']}, "
+            f"evictions={bs['evictions']}, size={bs['size']}/{bs['maxsize']}, "
+            f"hit_rate={bs['hit_rate']:.2%}"
+        )
+        if self.potential_features:
+            ps = POTENTIAL_CACHE.stats()
+            st_logger(
+                f"[Potential cache] hits={ps['hits']}, misses={ps['misses']}, "
+                f"size={ps['size']}/{ps['maxsize']}, hit_rate={ps['hit_rate']:.2%}"
+            )
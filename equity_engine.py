@@ -0,0 +1,925 @@
+# equity_engine.py
+# Motor de equity por lotes: reparte todas las simulaciones a la vez como
+# arrays de cartas 0..51 (ver cards.py) y las puntúa con hand_evaluator.
+# Las funciones públicas aceptan cartas en cualquier representación de cards.to_index.
+
+from collections import OrderedDict
+from itertools import combinations
+from math import comb
+import os
+import threading
+import numpy as np
+from cards import rank_of, suit_of, suit_rank_masks, to_index, to_indices
+from hand_evaluator import BoardPrefix, evaluate_batch
+
+_rng = np.random.default_rng()
+
+PREFLOP_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.npz')
+PREFLOP_MATRIX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_matrix.npy')
+
+
+# --------------------------------------------------------
+# Perfiles de rango del oponente
+# --------------------------------------------------------
+def is_hand_in_range(card1, card2, profile="balanced"):
+    card1, card2 = to_index(card1), to_index(card2)
+    ranks_sorted = sorted([rank_of(card1), rank_of(card2)], reverse=True)
+    suits_list = [suit_of(card1), suit_of(card2)]
+    gap = abs(ranks_sorted[0] - ranks_sorted[1])
+    same_suit = suits_list[0] == suits_list[1]
+
+    high_card = ranks_sorted[0]
+    low_card = ranks_sorted[1]
+
+    is_pair = high_card == low_card
+    is_suited = same_suit
+    is_connector = gap <= 1
+    both_high = high_card >= 11 and low_card >= 10  # QJ, KQ, AJ...
+
+    if profile == "tight":
+        if is_pair and high_card >= 9:
+            return True
+        if both_high and is_suited:
+            return True
+        if is_connector and is_suited and high_card >= 10:
+            return True
+        return False
+
+    elif profile == "loose":
+        if is_pair:
+            return True
+        if is_connector:
+            return True
+        if is_suited and high_card >= 6:
+            return True
+        if high_card >= 10:
+            return True
+        return False
+
+    else:  # "balanced"
+        if is_pair and high_card >= 7:
+            return True
+        if both_high:
+            return True
+        if is_connector and is_suited:
+            return True
+        if is_connector:
+            return True
+        return False
+
+
+# --------------------------------------------------------
+# Rangos precompilados sobre las 1326 combinaciones
+# --------------------------------------------------------
+NUM_COMBOS = 1326
+
+_COMBOS = np.array(list(combinations(range(52), 2)), dtype=np.int64)
+
+# _COMBO_ID[c1, c2] -> índice de combo (simétrico)
+_COMBO_ID = np.full((52, 52), -1, dtype=np.int64)
+_COMBO_ID[_COMBOS[:, 0], _COMBOS[:, 1]] = np.arange(NUM_COMBOS)
+_COMBO_ID[_COMBOS[:, 1], _COMBOS[:, 0]] = np.arange(NUM_COMBOS)
+
+# _BLOCKERS[c] -> máscara de combos que contienen la carta c
+_BLOCKERS = np.zeros((52, NUM_COMBOS), dtype=bool)
+_BLOCKERS[_COMBOS[:, 0], np.arange(NUM_COMBOS)] = True
+_BLOCKERS[_COMBOS[:, 1], np.arange(NUM_COMBOS)] = True
+
+_RANGE_WEIGHTS = {}
+
+
+def range_weights(profile="balanced"):
+    """
+    Vector de 1326 pesos (1.0 dentro del perfil, 0.0 fuera), compilado una
+    sola vez por perfil a partir de is_hand_in_range.
+    """
+    if profile not in _RANGE_WEIGHTS:
+        w = np.array([
+            1.0 if is_hand_in_range(c1, c2, profile=profile) else 0.0
+            for c1, c2 in _COMBOS
+        ])
+        w.flags.writeable = False
+        _RANGE_WEIGHTS[profile] = w
+    return _RANGE_WEIGHTS[profile]
+
+
+def live_range_weights(dead, profile="balanced"):
+    """
+    Pesos del perfil con las combos bloqueadas por las cartas muertas a cero.
+    Si ninguna mano pasa el filtro, se usan todas las combinaciones vivas.
+    """
+    blocked = _BLOCKERS[list(dead)].any(axis=0)
+    w = np.where(blocked, 0.0, range_weights(profile))
+    if not w.any():
+        w = (~blocked).astype(float)
+    return w
+
+
+def _opponent_combos(dead, profile):
+    """Combos vivas del perfil como array (K, 2) y sus probabilidades."""
+    w = live_range_weights(dead, profile)
+    ids = np.flatnonzero(w)
+    return _COMBOS[ids], w[ids] / w[ids].sum()
+
+
+# --------------------------------------------------------
+# Clases de mano preflop (169) y tabla de equity precalculada
+# --------------------------------------------------------
+NUM_CLASSES = 169
+
+
+def hand_class(c1, c2):
+    """
+    Índice 0..168 de la clase preflop en la rejilla 13x13 (fila/columna 0 = As):
+    parejas en la diagonal, suited encima y offsuit debajo.
+    """
+    hi, lo = max(c1 % 13, c2 % 13), min(c1 % 13, c2 % 13)
+    if c1 // 13 == c2 // 13:
+        return (12 - hi) * 13 + (12 - lo)
+    return (12 - lo) * 13 + (12 - hi)
+
+
+def class_representative(cls):
+    """Una combo (c1, c2) cualquiera de la clase cls."""
+    row, col = divmod(cls, 13)
+    if row <= col:   # pareja o suited
+        hi, lo = 12 - row, 12 - col
+        return (hi, lo + 13) if hi == lo else (hi, lo)
+    return (12 - col, 12 - row + 13)
+
+
+def _load_preflop_table(path=PREFLOP_TABLE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files if name != 'num_sim'}
+
+
+_PREFLOP_TABLE = _load_preflop_table()
+
+
+def preflop_equity(hole, profile="balanced"):
+    """
+    Equity preflop de la tabla; para perfiles no tabulados se usa la matriz
+    169x169 (None si tampoco está disponible).
+    """
+    table = _PREFLOP_TABLE.get(profile)
+    if table is None:
+        if _PREFLOP_MATRIX is None:
+            return None
+        return hand_vs_range(hole, profile)
+    return float(table[hand_class(to_index(hole[0]), to_index(hole[1]))])
+
+
+# --------------------------------------------------------
+# Simulación por lotes
+# --------------------------------------------------------
+def _deal_batch(live, opp_combos, opp_probs, missing, num_sim, rng):
+    """
+    Reparte num_sim manos del oponente y runouts de una sola vez.
+    Devuelve (opp (N, 2), runout (N, missing)).
+    """
+    opp = opp_combos[rng.choice(len(opp_combos), size=num_sim, p=opp_probs)]
+    return opp, _deal_runouts(live, opp, missing, rng)
+
+
+def _deal_runouts(live, exclude, missing, rng):
+    """
+    Para cada fila, missing cartas distintas de live que no estén en la fila
+    correspondiente de exclude (N, k). Devuelve (N, missing).
+    """
+    n = len(exclude)
+    if missing == 0:
+        return np.empty((n, 0), dtype=np.int64)
+
+    # Claves aleatorias por carta viva; las excluidas quedan al final
+    keys = rng.random((n, len(live)))
+    for j in range(exclude.shape[1]):
+        keys[live[None, :] == exclude[:, j:j + 1]] = 2.0
+    picks = np.argpartition(keys, missing - 1, axis=1)[:, :missing]
+    return live[picks]
+
+
+def _showdown_outcomes(hero, board, opp, runout):
+    """Resultado por simulación desde el punto de vista de hero: 1, 0.5 o 0."""
+    n = len(opp)
+    full_board = np.hstack([np.broadcast_to(board, (n, len(board))), runout])
+    score_hero = evaluate_batch(np.hstack([np.broadcast_to(hero, (n, 2)), full_board]))
+    score_opp = evaluate_batch(np.hstack([opp, full_board]))
+    return np.where(score_hero < score_opp, 1.0,
+                    np.where(score_hero == score_opp, 0.5, 0.0))
+
+
+def _prepare(hole, community):
+    hero = np.array(to_indices(hole), dtype=np.int64)
+    board = np.array(to_indices(community), dtype=np.int64)
+    dead = set(hero.tolist()) | set(board.tolist())
+    live = np.array([i for i in range(52) if i not in dead], dtype=np.int64)
+    return hero, board, dead, live
+
+
+def monte_carlo_equity(hole, community, num_sim=100, profile="balanced", rng=None):
+    """
+    Equity de hole contra un oponente del perfil dado, con num_sim simulaciones
+    repartidas y evaluadas en bloque.
+    """
+    if num_sim <= 0:
+        return 0.0
+    rng = rng or _rng
+
+    hero, board, dead, live = _prepare(hole, community)
+
+    opp_combos, opp_probs = _opponent_combos(dead, profile)
+    opp, runout = _deal_batch(live, opp_combos, opp_probs, 5 - len(board), num_sim, rng)
+    return float(_showdown_outcomes(hero, board, opp, runout).mean())
+
+
+# --------------------------------------------------------
+# Enumeración exacta (turn y river)
+# --------------------------------------------------------
+def exact_equity(hole, community, profile="balanced"):
+    """
+    Equity exacta enumerando todas las manos del oponente (y, en el turn,
+    todas las cartas de river). Requiere al menos 4 cartas comunitarias.
+    """
+    if len(community) < 4:
+        raise ValueError("exact_equity requiere turn o river (>= 4 cartas comunitarias)")
+
+    hero, board, dead, live = _prepare(hole, community)
+    w = live_range_weights(dead, profile)
+    ids = np.flatnonzero(w)
+    opp = _COMBOS[ids]
+
+    prefix = BoardPrefix(board)
+    if len(board) == 5:
+        # Board completo: toda la range se puntúa en una sola pasada
+        hero_scores = prefix.evaluate(hero[None, :])
+        opp_scores = prefix.evaluate(opp)
+        ri = np.zeros(len(ids), dtype=np.int64)
+        ki = np.arange(len(ids))
+    else:
+        # Cada combo del oponente se cruza con los rivers que no bloquea
+        rivers = live[:, None]
+        valid = (opp[None, :, 0] != rivers) & (opp[None, :, 1] != rivers)
+        ri, ki = np.nonzero(valid)
+        hero_scores = prefix.evaluate(np.hstack([rivers, np.broadcast_to(hero, (len(rivers), 2))]))
+        opp_scores = prefix.evaluate(np.hstack([rivers[ri], opp[ki]]))
+
+    hs = hero_scores[ri]
+    outcomes = np.where(hs < opp_scores, 1.0, np.where(hs == opp_scores, 0.5, 0.0))
+    weights = w[ids][ki]
+    return float((outcomes * weights).sum() / weights.sum())
+
+
+# --------------------------------------------------------
+# Canonicalización por palos y caché LRU
+# --------------------------------------------------------
+def canonical_key(hole, community, profile="balanced"):
+    """
+    Clave invariante a permutaciones de palo y al orden de las cartas.
+    Cada palo se resume en (máscara de ranks en hole, máscara en board);
+    dos situaciones son isomorfas si y solo si tienen el mismo multiconjunto
+    de firmas, así que basta con ordenarlas.
+    """
+    hole_masks = suit_rank_masks(to_indices(hole))
+    board_masks = suit_rank_masks(to_indices(community))
+    return (profile,) + tuple(sorted(zip(hole_masks, board_masks)))
+
+
+class LRUCache:
+    """
+    Caché LRU acotada y segura entre hilos (los hilos de Flask la comparten):
+    un lock protege el OrderedDict. get() devuelve None si la clave no está.
+    """
+
+    def __init__(self, maxsize=200000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / total if total > 0 else 0.0
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+class EquityCache(LRUCache):
+    """
+    LRUCache de equities. Cada entrada guarda el valor y su precisión
+    (num_sim, o infinito si es exacta/tabulada); una consulta solo acierta
+    si la entrada es al menos tan precisa como la pedida.
+    """
+
+    def get(self, key, precision):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < precision:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, precision):
+        super().put(key, (value, precision))
+
+
+EQUITY_CACHE = EquityCache()
+
+
+def equity(hole, community, num_sim=100, profile="balanced", exact=None, rng=None,
+           cache=EQUITY_CACHE, variance_reduction=(), return_stderr=False):
+    """
+    Punto de entrada único:
+      - exact=None: tabla en preflop, enumeración exacta en turn/river y
+        Monte Carlo en el flop.
+      - exact=True: fuerza la enumeración (solo turn/river).
+      - exact=False: siempre Monte Carlo con num_sim simulaciones.
+    variance_reduction: métodos de equity_with_stderr ('stratified', 'lhs',
+    'control') para la vía Monte Carlo. Con return_stderr=True devuelve
+    (equity, stderr), con stderr 0 si el valor es tabulado o exacto.
+    Los resultados pasan por cache (None para desactivarla); el error
+    estándar no se guarda, así que return_stderr no lee de la caché en la
+    vía Monte Carlo.
+    """
+    if not community and exact is not False:
+        eq = preflop_equity(hole, profile)
+        if eq is not None:
+            return (eq, 0.0) if return_stderr else eq
+    if exact is None:
+        exact = len(community) >= 4
+    precision = float('inf') if exact else num_sim
+
+    if cache is not None:
+        key = canonical_key(hole, community, profile)
+        if exact or not return_stderr:
+            eq = cache.get(key, precision)
+            if eq is not None:
+                return (eq, 0.0) if return_stderr else eq
+
+    stderr = 0.0
+    if exact:
+        eq = exact_equity(hole, community, profile=profile)
+    elif variance_reduction or return_stderr:
+        eq, stderr = equity_with_stderr(hole, community, num_sim=num_sim, profile=profile,
+                                        variance_reduction=variance_reduction, rng=rng)
+    else:
+        eq = monte_carlo_equity(hole, community, num_sim=num_sim, profile=profile, rng=rng)
+
+    if cache is not None:
+        cache.put(key, eq, precision)
+    return (eq, stderr) if return_stderr else eq
+
+
+# --------------------------------------------------------
+# Sesión de equity con números aleatorios comunes
+# --------------------------------------------------------
+class EquitySession:
+    """
+    Fija, para una decisión, una única secuencia de (mano rival, runout) y la
+    reutiliza en todas las consultas: cada estimación con n simulaciones usa
+    siempre las mismas n primeras muestras, que solo se amplían cuando hace
+    falta. Así, comparar acciones o umbrales dentro de la decisión no añade
+    ruido ni simulaciones repetidas.
+    En preflop (tabla) y turn/river (enumeración exacta) no hay muestreo.
+    """
+
+    def __init__(self, hole, community, profile="balanced", rng=None):
+        self.profile = profile
+        self.exact = not community or len(community) >= 4
+        self._exact_value = None
+        if self.exact:
+            self._hole, self._community = hole, community
+            return
+        self._rng = rng or _rng
+        self._hero, self._board, dead, self._live = _prepare(hole, community)
+        self._opp_combos, self._opp_probs = _opponent_combos(dead, profile)
+        self._outcomes = np.empty(0)
+
+    @property
+    def sims_drawn(self):
+        return 0 if self.exact else len(self._outcomes)
+
+    def _exact_equity(self):
+        # Se calcula solo si alguna rama de la decisión llega a pedirla
+        if self._exact_value is None:
+            self._exact_value = equity(self._hole, self._community, profile=self.profile)
+        return self._exact_value
+
+    def _ensure(self, n):
+        missing = n - len(self._outcomes)
+        if missing > 0:
+            opp, runout = _deal_batch(self._live, self._opp_combos, self._opp_probs,
+                                      5 - len(self._board), missing, self._rng)
+            self._outcomes = np.concatenate(
+                [self._outcomes, _showdown_outcomes(self._hero, self._board, opp, runout)]
+            )
+
+    def estimate(self, num_sim):
+        """(equity, stderr) con las num_sim primeras muestras de la sesión."""
+        if self.exact:
+            return self._exact_equity(), 0.0
+        if num_sim <= 0:
+            return 0.0, float('inf')
+        self._ensure(num_sim)
+        sample = self._outcomes[:num_sim]
+        stderr = sample.std(ddof=1) / np.sqrt(num_sim) if num_sim > 1 else float('inf')
+        return float(sample.mean()), float(stderr)
+
+    def equity(self, num_sim=500):
+        return self.estimate(num_sim)[0]
+
+    def adaptive(self, target_stderr=None, thresholds=None, z=2.58,
+                 batch_size=100, min_sims=100, max_sims=2000):
+        """
+        Recorre la muestra de la sesión por lotes de batch_size y se detiene en
+        cuanto el error estándar baja de target_stderr, o cuando la equity queda
+        a más de z errores estándar de todos los umbrales (float o lista).
+        Devuelve (equity, stderr, sims_usadas).
+        """
+        if self.exact:
+            return self._exact_equity(), 0.0, 0
+        if thresholds is not None and np.isscalar(thresholds):
+            thresholds = [thresholds]
+
+        n = 0
+        mean, stderr = 0.0, float('inf')
+        while n < max_sims:
+            n = min(n + batch_size, max_sims)
+            mean, stderr = self.estimate(n)
+            if n < min_sims:
+                continue
+            if target_stderr is not None and stderr <= target_stderr:
+                break
+            if thresholds and all(abs(mean - t) > z * stderr for t in thresholds):
+                break
+        return mean, stderr, n
+
+
+# --------------------------------------------------------
+# Precisión adaptativa con parada temprana
+# --------------------------------------------------------
+def adaptive_equity(hole, community, profile="balanced", target_stderr=None,
+                    thresholds=None, z=2.58, batch_size=100, min_sims=100,
+                    max_sims=2000, rng=None):
+    """
+    Monte Carlo secuencial por lotes de batch_size simulaciones. Se detiene en
+    cuanto el error estándar baja de target_stderr, o cuando la equity queda a
+    más de z errores estándar de todos los umbrales (thresholds: float o lista),
+    y como mucho tras max_sims simulaciones.
+    Devuelve (equity, stderr, sims_usadas). En preflop (tabla) y en turn/river
+    (enumeración exacta) el resultado es inmediato con stderr 0.
+    """
+    session = EquitySession(hole, community, profile=profile, rng=rng)
+    return session.adaptive(target_stderr=target_stderr, thresholds=thresholds, z=z,
+                            batch_size=batch_size, min_sims=min_sims, max_sims=max_sims)
+
+
+# --------------------------------------------------------
+# Monte Carlo con reducción de varianza
+# --------------------------------------------------------
+VARIANCE_REDUCTION_METHODS = ('stratified', 'lhs', 'control')
+
+# Clase preflop (0..168) de cada una de las 1326 combos
+_COMBO_CLASS = np.array([hand_class(c1, c2) for c1, c2 in _COMBOS], dtype=np.int64)
+
+
+def equity_with_stderr(hole, community, num_sim=500, profile="balanced",
+                       variance_reduction=(), rng=None):
+    """
+    Monte Carlo con estrategias de reducción de varianza combinables:
+      - 'stratified': muestreo sistemático de la mano rival ordenada por clase
+        preflop (asignación proporcional por estrato).
+      - 'lhs': la primera carta del runout se estratifica (hipercubo latino)
+        sobre la baraja viva.
+      - 'control': variables de control con media exacta conocida sobre la
+        range viva: equity preflop (tabla) de la clase rival y resultado del
+        enfrentamiento con el board actual; beta por mínimos cuadrados.
+    Devuelve (equity, stderr). En preflop (tabla) y turn/river (enumeración
+    exacta) el error es 0.
+    """
+    if isinstance(variance_reduction, str):
+        variance_reduction = (variance_reduction,)
+    methods = set(variance_reduction)
+    unknown = methods - set(VARIANCE_REDUCTION_METHODS)
+    if unknown:
+        raise ValueError(f"Métodos de reducción de varianza desconocidos: {sorted(unknown)}")
+
+    if not community or len(community) >= 4:
+        return equity(hole, community, profile=profile), 0.0
+    if num_sim <= 1:
+        return monte_carlo_equity(hole, community, num_sim=num_sim, profile=profile, rng=rng), float('inf')
+    rng = rng or _rng
+
+    hero, board, dead, live = _prepare(hole, community)
+    w = live_range_weights(dead, profile)
+    ids = np.flatnonzero(w)
+    probs = w[ids] / w[ids].sum()
+    classes = _COMBO_CLASS[ids]
+
+    # 1) Mano del oponente
+    if 'stratified' in methods:
+        order = np.argsort(classes, kind='stable')
+        ids, probs, classes = ids[order], probs[order], classes[order]
+        cdf = np.cumsum(probs)
+        u = (rng.random() + np.arange(num_sim)) / num_sim
+        pick = np.minimum(np.searchsorted(cdf, u, side='right'), len(ids) - 1)
+    else:
+        pick = rng.choice(len(ids), size=num_sim, p=probs)
+    opp = _COMBOS[ids[pick]]
+
+    # 2) Runout
+    missing = 5 - len(board)
+    if 'lhs' in methods:
+        # Cartas disponibles por fila (live sin las del rival), en orden fijo
+        avail_mask = (live[None, :] != opp[:, :1]) & (live[None, :] != opp[:, 1:])
+        avail = live[np.argsort(~avail_mask, axis=1, kind='stable')[:, :len(live) - 2]]
+        strata = (rng.permutation(num_sim) + rng.random(num_sim)) / num_sim
+        first = avail[np.arange(num_sim), (strata * avail.shape[1]).astype(np.int64)]
+        rest = _deal_runouts(live, np.column_stack([opp, first]), missing - 1, rng)
+        runout = np.column_stack([first, rest])
+    else:
+        runout = _deal_runouts(live, opp, missing, rng)
+
+    y = _showdown_outcomes(hero, board, opp, runout)
+
+    # 3) Variables de control (medias exactas sobre la range viva)
+    if 'control' in methods:
+        controls = []
+        table = _PREFLOP_TABLE.get(profile)
+        if table is not None:
+            controls.append(table[classes])
+        # Resultado del enfrentamiento con el board actual, sin runout
+        prefix = BoardPrefix(board)
+        hero_now = prefix.evaluate(hero[None, :])[0]
+        opp_now = prefix.evaluate(_COMBOS[ids])
+        controls.append(np.where(hero_now < opp_now, 1.0, np.where(hero_now == opp_now, 0.5, 0.0)))
+
+        x_all = np.column_stack(controls)
+        x = x_all[pick] - (probs[:, None] * x_all).sum(axis=0)
+        xc = x - x.mean(axis=0)
+        beta = np.linalg.lstsq(xc, y - y.mean(), rcond=None)[0]
+        y = y - x @ beta
+
+    mean = float(y.mean())
+    if 'stratified' in methods:
+        # Varianza intra-estrato agrupada
+        strata_ids, inverse = np.unique(classes[pick], return_inverse=True)
+        group_mean = np.bincount(inverse, weights=y) / np.bincount(inverse)
+        resid = y - group_mean[inverse]
+        var = (resid ** 2).sum() / max(num_sim - len(strata_ids), 1)
+    else:
+        var = y.var(ddof=1)
+    return mean, float(np.sqrt(var / num_sim))
+
+
+# --------------------------------------------------------
+# Potencial de mano (PPot / NPot) con lookahead de 1 o 2 cartas
+# --------------------------------------------------------
+# Índices de estado: delante, empate, detrás
+_AHEAD, _TIED, _BEHIND = 0, 1, 2
+
+POTENTIAL_CACHE = EquityCache(maxsize=50000)
+
+
+def _hand_states(hero_scores, opp_scores):
+    return np.where(hero_scores < opp_scores, _AHEAD,
+                    np.where(hero_scores == opp_scores, _TIED, _BEHIND))
+
+
+def hand_potential(hole, community, profile="balanced", lookahead=2, num_runouts=None,
+                   rng=None, cache=POTENTIAL_CACHE):
+    """
+    Potencial positivo y negativo de la mano (Billings et al.) contra la range
+    del perfil, mirando lookahead cartas por delante (limitado al river).
+
+    Se cruza el estado actual (delante / empate / detrás) de cada combo rival
+    con el estado final en cada runout. Con num_runouts=None se enumeran todos
+    los runouts; si no, se muestrean num_runouts. Todo se puntúa en bloque
+    sobre el prefijo del board.
+
+    Devuelve un dict con:
+      hs:   fuerza actual (fracción de la range que vamos ganando, empates a 1/2)
+      ppot: P(terminar delante | ahora detrás o empatados)
+      npot: P(terminar detrás | ahora delante o empatados)
+      ehs:  hs * (1 - npot) + (1 - hs) * ppot
+      ehs2: media sobre runouts de la fuerza final al cuadrado
+
+    En preflop no hay fuerza actual: hs = ehs = equity de la tabla, potenciales
+    0. En el river los potenciales son 0 y ehs = hs.
+    Los resultados se guardan por clase isomorfa de palos en cache.
+    """
+    exact = num_runouts is None
+    precision = float('inf') if exact else num_runouts
+    key = None
+    if cache is not None:
+        key = canonical_key(hole, community, profile) + ('potential', lookahead)
+        hit = cache.get(key, precision)
+        if hit is not None:
+            return hit
+
+    if not community:
+        hs = equity(hole, community, profile=profile)
+        result = {'hs': hs, 'ppot': 0.0, 'npot': 0.0, 'ehs': hs, 'ehs2': hs * hs}
+        if cache is not None:
+            cache.put(key, result, float('inf'))
+        return result
+
+    hero, board, dead, live = _prepare(hole, community)
+    w = live_range_weights(dead, profile)
+    ids = np.flatnonzero(w)
+    opp, weights = _COMBOS[ids], w[ids]
+
+    prefix = BoardPrefix(board)
+    now = _hand_states(prefix.evaluate(hero[None, :])[0], prefix.evaluate(opp))
+    hs = float(((now == _AHEAD) * weights + (now == _TIED) * 0.5 * weights).sum() / weights.sum())
+
+    depth = min(lookahead, 5 - len(board))
+    if depth <= 0:
+        result = {'hs': hs, 'ppot': 0.0, 'npot': 0.0, 'ehs': hs, 'ehs2': hs * hs}
+        if cache is not None:
+            cache.put(key, result, float('inf'))
+        return result
+
+    # Runouts de depth cartas de la baraja viva (se enumeran si no hay más que num_runouts)
+    if not exact and num_runouts >= comb(len(live), depth):
+        exact, precision = True, float('inf')
+    if exact:
+        runouts = np.array(list(combinations(live.tolist(), depth)), dtype=np.int64)
+    else:
+        rng = rng or _rng
+        runouts = _deal_runouts(live, np.empty((num_runouts, 0), dtype=np.int64), depth, rng)
+
+    # Pares (runout, combo rival) compatibles, puntuados en una sola pasada
+    valid = ~_BLOCKERS[runouts].any(axis=1)[:, ids]
+    ri, ki = np.nonzero(valid)
+    hero_final = prefix.evaluate(np.hstack([runouts, np.broadcast_to(hero, (len(runouts), 2))]))
+    opp_final = prefix.evaluate(np.hstack([runouts[ri], opp[ki]]))
+    final = _hand_states(hero_final[ri], opp_final)
+
+    wk = weights[ki]
+    hp = np.bincount(now[ki] * 3 + final, weights=wk, minlength=9).reshape(3, 3)
+    totals = hp.sum(axis=1)
+
+    den = totals[_BEHIND] + totals[_TIED] / 2
+    ppot = (hp[_BEHIND, _AHEAD] + hp[_BEHIND, _TIED] / 2 + hp[_TIED, _AHEAD] / 2) / den if den > 0 else 0.0
+    den = totals[_AHEAD] + totals[_TIED] / 2
+    npot = (hp[_AHEAD, _BEHIND] + hp[_TIED, _BEHIND] / 2 + hp[_AHEAD, _TIED] / 2) / den if den > 0 else 0.0
+
+    # Fuerza final por runout para EHS²
+    won = (final == _AHEAD) + (final == _TIED) * 0.5
+    hs_final = (np.bincount(ri, weights=wk * won, minlength=len(runouts))
+                / np.maximum(np.bincount(ri, weights=wk, minlength=len(runouts)), 1e-12))
+
+    ppot, npot = float(ppot), float(npot)
+    result = {
+        'hs': hs,
+        'ppot': ppot,
+        'npot': npot,
+        'ehs': hs * (1 - npot) + (1 - hs) * ppot,
+        'ehs2': float((hs_final ** 2).mean())
+    }
+    if cache is not None:
+        cache.put(key, result, precision)
+    return result
+
+
+# --------------------------------------------------------
+# Matriz preflop clase contra clase (169 x 169)
+# --------------------------------------------------------
+# preflop_matrix.npy (build_preflop_table.py matrix), abierto con mmap:
+#   [0, i, j] equity media de la clase i contra la clase j
+#   [1, i, j] número de pares de combos (i, j) compatibles (sin cartas comunes)
+_CLASS_COMBOS = [np.flatnonzero(_COMBO_CLASS == cls) for cls in range(NUM_CLASSES)]
+
+
+def _load_preflop_matrix(path=PREFLOP_MATRIX_FILE):
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r')
+
+
+_PREFLOP_MATRIX = _load_preflop_matrix()
+
+
+_CLASS_SIZES = np.array([len(c) for c in _CLASS_COMBOS], dtype=float)
+
+
+def class_weights(weights):
+    """
+    Peso medio por combo de cada clase (169 valores en 0..1) a partir de un
+    perfil, un vector de 1326 pesos por combo o un vector que ya es por clase.
+    """
+    if isinstance(weights, str):
+        weights = range_weights(weights)
+    weights = np.asarray(weights, dtype=float)
+    if len(weights) == NUM_CLASSES:
+        return weights
+    return np.bincount(_COMBO_CLASS, weights=weights, minlength=NUM_CLASSES) / _CLASS_SIZES
+
+
+def hand_vs_range(hole, weights="balanced"):
+    """
+    Equity preflop de hole contra una range (perfil o vector de 1326 pesos),
+    con la equity clase contra clase de la matriz y el efecto de bloqueo
+    exacto: cada clase rival pesa según sus combos vivas.
+    """
+    if _PREFLOP_MATRIX is None:
+        raise FileNotFoundError(f"No existe {PREFLOP_MATRIX_FILE}; ejecuta build_preflop_table.py matrix")
+    c1, c2 = to_index(hole[0]), to_index(hole[1])
+    if isinstance(weights, str):
+        weights = range_weights(weights)
+    weights = np.asarray(weights, dtype=float)
+    if len(weights) == NUM_CLASSES:
+        weights = weights[_COMBO_CLASS]
+    live = np.where(_BLOCKERS[c1] | _BLOCKERS[c2], 0.0, weights)
+    per_class = np.bincount(_COMBO_CLASS, weights=live, minlength=NUM_CLASSES)
+    total = per_class.sum()
+    if total <= 0:
+        return 0.5
+    return float(_PREFLOP_MATRIX[0, hand_class(c1, c2)] @ per_class / total)
+
+
+def range_vs_range(weights_a, weights_b):
+    """
+    Equity preflop de la range a contra la range b (perfiles, vectores de
+    1326 combos o de 169 clases), ponderando cada par de clases por sus pares
+    de combos compatibles.
+    """
+    if _PREFLOP_MATRIX is None:
+        raise FileNotFoundError(f"No existe {PREFLOP_MATRIX_FILE}; ejecuta build_preflop_table.py matrix")
+    pair_w = np.outer(class_weights(weights_a), class_weights(weights_b)) * _PREFLOP_MATRIX[1]
+    total = pair_w.sum()
+    if total <= 0:
+        return 0.5
+    return float((pair_w * _PREFLOP_MATRIX[0]).sum() / total)
+
+
+# --------------------------------------------------------
+# Vector de equity de las 1326 manos sobre un board
+# --------------------------------------------------------
+# Incidencia combo -> carta: _COMBO_CARDS[k, c] = 1 si la combo k contiene c
+_COMBO_CARDS = _BLOCKERS.T.astype(float)
+
+
+def _river_sweep(board, weights):
+    """
+    Numerador y denominador de la equity de cada combo en un river fijo.
+    Las combos se ordenan por fuerza una sola vez. Con sumas acumuladas de pesos
+    (totales y por carta) se obtiene, para cada mano, el peso rival que le gana,
+    empata o pierde, descontando las combos que comparten carta con ella.
+    Las combos que chocan con el board quedan con denominador 0.
+    """
+    live = ~_BLOCKERS[board].any(axis=0)
+    ids = np.flatnonzero(live)
+    scores = BoardPrefix(board).evaluate(_COMBOS[ids])
+    w = weights[ids]
+
+    order = np.argsort(scores, kind='stable')
+    s_sorted = scores[order]
+    # Sumas desde cada posición hasta el final (manos iguales o peores)
+    by_card = _COMBO_CARDS[ids[order]] * w[order, None]
+    suffix_w = np.concatenate([np.cumsum(w[order][::-1])[::-1], [0.0]])
+    suffix_card = np.vstack([np.cumsum(by_card[::-1], axis=0)[::-1], np.zeros((1, 52))])
+
+    lo = np.searchsorted(s_sorted, scores, side='left')    # primera igual
+    hi = np.searchsorted(s_sorted, scores, side='right')   # primera peor
+    a, b = _COMBOS[ids, 0], _COMBOS[ids, 1]
+
+    worse = suffix_w[hi] - suffix_card[hi, a] - suffix_card[hi, b]
+    # La propia combo está en el grupo de empates y se resta dos veces (una por carta)
+    tied = (suffix_w[lo] - suffix_w[hi]
+            - (suffix_card[lo, a] - suffix_card[hi, a])
+            - (suffix_card[lo, b] - suffix_card[hi, b]) + w)
+    total = w.sum() - suffix_card[0, a] - suffix_card[0, b] + w
+
+    num = np.zeros(NUM_COMBOS)
+    den = np.zeros(NUM_COMBOS)
+    num[ids] = worse + 0.5 * tied
+    den[ids] = total
+    return num, den
+
+
+def equity_vector(community, weights="balanced"):
+    """
+    Equity de cada una de las 1326 combos (orden de _COMBOS) contra una range
+    (perfil o vector de 1326 pesos) en un river o un turn.
+    En el turn se acumulan numeradores y denominadores sobre todos los rivers,
+    igual que exact_equity. Las combos que chocan con el board (o sin
+    ninguna combo rival viva) valen NaN.
+    """
+    board = np.array(to_indices(community), dtype=np.int64)
+    if len(board) not in (4, 5):
+        raise ValueError("equity_vector requiere turn o river (4 o 5 cartas comunitarias)")
+    if isinstance(weights, str):
+        weights = range_weights(weights)
+    weights = np.asarray(weights, dtype=float)
+
+    if len(board) == 5:
+        num, den = _river_sweep(board, weights)
+    else:
+        num, den = np.zeros(NUM_COMBOS), np.zeros(NUM_COMBOS)
+        for river in range(52):
+            if river in board:
+                continue
+            n, d = _river_sweep(np.append(board, river), weights)
+            num += n
+            den += d
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        eq = num / den
+    eq[_BLOCKERS[board].any(axis=0)] = np.nan
+    return eq
+
+
+# --------------------------------------------------------
+# Equity de muchos estados distintos en una sola pasada
+# --------------------------------------------------------
+def batch_equity(holes, boards, num_sim=100, profile="balanced", rng=None, cache=EQUITY_CACHE,
+                 chunk=2048):
+    """
+    Equity de N estados (hole, board) con la misma política que equity():
+    tabla en preflop, enumeración exacta (con caché) en turn/river y, en el
+    flop, Monte Carlo de num_sim simulaciones por estado repartidas y
+    evaluadas todas juntas (cada fila con su propia range viva), por trozos
+    de chunk estados. Devuelve un array (N,).
+    """
+    rng = rng or _rng
+    result = np.empty(len(holes))
+    flop_rows = []
+    for i, (hole, board) in enumerate(zip(holes, boards)):
+        if len(board) == 3 and num_sim > 0:
+            flop_rows.append(i)
+        else:
+            result[i] = equity(hole, board, num_sim=num_sim, profile=profile, cache=cache)
+
+    for start in range(0, len(flop_rows), chunk):
+        rows = flop_rows[start:start + chunk]
+        hero = np.array([to_indices(holes[i]) for i in rows], dtype=np.int64)
+        board = np.array([to_indices(boards[i]) for i in rows], dtype=np.int64)
+        result[rows] = _flop_batch_equity(hero, board, num_sim, profile, rng)
+    return result
+
+
+def _flop_batch_equity(hero, board, num_sim, profile, rng):
+    n = len(hero)
+    dead = np.hstack([hero, board])
+
+    # Mano rival por fila: muestreo inverso sobre la CDF normalizada de su
+    # range viva; sumando el número de fila, todas las búsquedas van juntas
+    w = np.where(_BLOCKERS[dead].any(axis=1), 0.0, range_weights(profile))
+    empty = w.sum(axis=1) == 0
+    w[empty] = ~_BLOCKERS[dead[empty]].any(axis=1)
+    row = np.arange(n)
+    cdf = np.cumsum(w, axis=1)
+    cdf = cdf / cdf[:, -1:] + row[:, None]
+    u = rng.random((n, num_sim)) + row[:, None]
+    picks = np.searchsorted(cdf.ravel(), u.ravel(), side='right') - np.repeat(row, num_sim) * NUM_COMBOS
+    opp = _COMBOS[np.minimum(picks, NUM_COMBOS - 1)]
+
+    # Runouts y evaluación de todas las simulaciones en bloque
+    hero_rep = np.repeat(hero, num_sim, axis=0)
+    board_rep = np.repeat(board, num_sim, axis=0)
+    runout = _deal_runouts(np.arange(52, dtype=np.int64),
+                           np.hstack([hero_rep, board_rep, opp]), 2, rng)
+    full_board = np.hstack([board_rep, runout])
+    score_hero = evaluate_batch(np.hstack([hero_rep, full_board]))
+    score_opp = evaluate_batch(np.hstack([opp, full_board]))
+    outcomes = np.where(score_hero < score_opp, 1.0, np.where(score_hero == score_opp, 0.5, 0.0))
+    return outcomes.reshape(n, num_sim).mean(axis=1)
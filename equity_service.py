@@ -0,0 +1,81 @@
+# equity_service.py
+# Servicio de equity por lotes sobre un pool de procesos.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from equity_engine import equity, hand_potential
+
+DEFAULT_NUM_SIM = 100
+DEFAULT_NUM_RUNOUTS = 64
+
+
+def _solve_chunk(chunk):
+    """Resuelve un trozo de consultas (hole, board, profile, precision) en un worker."""
+    return [
+        equity(hole, board,
+               num_sim=DEFAULT_NUM_SIM if precision is None else precision,
+               profile=profile)
+        for hole, board, profile, precision in chunk
+    ]
+
+
+def _solve_potential_chunk(chunk):
+    """Igual que _solve_chunk para hand_potential; precision = num_runouts."""
+    return [
+        hand_potential(hole, board, profile=profile,
+                       num_runouts=DEFAULT_NUM_RUNOUTS if precision is None else precision)
+        for hole, board, profile, precision in chunk
+    ]
+
+
+class EquityService:
+    """
+    Reparte listas de consultas de equity entre procesos, en trozos de
+    chunksize, y devuelve los resultados en el mismo orden.
+    Cada consulta es (hole, board, profile, precision), con precision = num_sim
+    (None = DEFAULT_NUM_SIM; en preflop/turn/river se usa tabla o enumeración).
+
+    Uso:
+        with EquityService() as svc:
+            eqs = svc.map(queries)
+            pots = svc.potentials(queries)   # precision = num_runouts
+
+    Con max_workers=1 no se crea pool y todo se resuelve en el proceso actual.
+    """
+
+    def __init__(self, max_workers=None, chunksize=64):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self._executor = None
+
+    def __enter__(self):
+        if self.max_workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def map(self, queries):
+        return self._run(_solve_chunk, queries)
+
+    def potentials(self, queries):
+        """Potencial de mano (dicts de hand_potential) de cada consulta, en orden."""
+        return self._run(_solve_potential_chunk, queries)
+
+    def _run(self, solver, queries):
+        queries = list(queries)
+        if self._executor is None or len(queries) <= self.chunksize:
+            return solver(queries)
+        chunks = [queries[i:i + self.chunksize] for i in range(0, len(queries), self.chunksize)]
+        results = []
+        for part in self._executor.map(solver, chunks):
+            results.extend(part)
+        return results
@@ -0,0 +1,437 @@
+# hand_evaluator.py
+# Evaluador de manos por tablas (NumPy), compatible con la escala de treys:
+# 1 = escalera real ... 7462 = peor carta alta (menor valor = mejor mano).
+
+import os
+import tempfile
+from itertools import combinations
+import numpy as np
+
+# Índice de carta 0..51 = suit * 13 + (rank - 2), mismo orden que poker_env.create_deck
+NUM_CARDS = 52
+WORST_RANK = 7462
+
+_RANK_POW = 5 ** np.arange(13, dtype=np.int64)   # clave base-5 del multiconjunto de ranks
+_RANK_BIT = 1 << np.arange(13, dtype=np.int64)   # bitmask de ranks (bit 0 = '2', bit 12 = 'A')
+
+# Escaleras como máscaras de 13 bits, de la más alta (A-K-Q-J-T) a la rueda (5-4-3-2-A)
+_STRAIGHT_MASKS = [0b11111 << i for i in range(8, -1, -1)] + [0b1000000001111]
+
+
+# ------------------------------------------
+# Construcción de las tablas de ranking
+# ------------------------------------------
+def _straight_high(mask):
+    """Devuelve el rank (0..12) más alto de la escalera contenida en mask, o -1."""
+    for i, sm in enumerate(_STRAIGHT_MASKS):
+        if mask & sm == sm:
+            return 12 - i if i < 9 else 3
+    return -1
+
+
+def _build_class_values():
+    """
+    Asigna a cada clase de 5 cartas su valor 1..7462 en el mismo orden que treys.
+    Devuelve un dict por categoría: clave (ranks 0..12) -> valor.
+    """
+    desc = list(range(12, -1, -1))
+    no_straight = [
+        c for c in combinations(desc, 5)
+        if _straight_high(sum(1 << r for r in c)) < 0
+    ]
+    straights = [12 - i if i < 9 else 3 for i in range(10)]
+
+    tables = {}
+    value = 1
+
+    def assign(name, keys):
+        nonlocal value
+        tables[name] = {}
+        for k in keys:
+            tables[name][k] = value
+            value += 1
+
+    assign('straight_flush', straights)
+    assign('quads', [(q, k) for q in desc for k in desc if k != q])
+    assign('full_house', [(t, p) for t in desc for p in desc if p != t])
+    assign('flush', no_straight)
+    assign('straight', straights)
+    assign('trips', [(t,) + k for t in desc
+                     for k in combinations([r for r in desc if r != t], 2)])
+    assign('two_pair', [p + (k,) for p in combinations(desc, 2)
+                        for k in desc if k not in p])
+    assign('pair', [(p,) + k for p in desc
+                    for k in combinations([r for r in desc if r != p], 3)])
+    assign('high_card', no_straight)
+    assert value - 1 == WORST_RANK
+    return tables
+
+
+def _best_non_flush(counts, t):
+    """
+    Valor de la mejor mano (sin color) dado el vector de 13 conteos por rank;
+    t = _build_class_values().
+    """
+    present = [r for r in range(12, -1, -1) if counts[r] > 0]
+    quads = [r for r in present if counts[r] >= 4]
+    trips = [r for r in present if counts[r] >= 3]
+    pairs = [r for r in present if counts[r] >= 2]
+
+    if quads:
+        q = quads[0]
+        return t['quads'][(q, next(r for r in present if r != q))]
+    if trips:
+        rest = [r for r in pairs if r != trips[0]]
+        if rest:
+            return t['full_house'][(trips[0], rest[0])]
+    high = _straight_high(sum(1 << r for r in present))
+    if high >= 0:
+        return t['straight'][high]
+    if trips:
+        kick = [r for r in present if r != trips[0]][:2]
+        return t['trips'][(trips[0],) + tuple(kick)]
+    if len(pairs) >= 2:
+        kick = next(r for r in present if r not in pairs[:2])
+        return t['two_pair'][(pairs[0], pairs[1], kick)]
+    if pairs:
+        kick = [r for r in present if r != pairs[0]][:3]
+        return t['pair'][(pairs[0],) + tuple(kick)]
+    return t['high_card'][tuple(present[:5])]
+
+
+def _count_vectors(n, rank=0, prefix=()):
+    """Genera todos los vectores de conteos (0..4 por rank) que suman n cartas."""
+    if rank == 12:
+        if n <= 4:
+            yield prefix + (n,)
+        return
+    for c in range(min(4, n) + 1):
+        yield from _count_vectors(n - c, rank + 1, prefix + (c,))
+
+
+def _build_non_flush_table(class_values):
+    keys, values = [], []
+    for n in (5, 6, 7):
+        for counts in _count_vectors(n):
+            keys.append(sum(c * 5 ** r for r, c in enumerate(counts)))
+            values.append(_best_non_flush(counts, class_values))
+    keys = np.array(keys, dtype=np.int64)
+    order = np.argsort(keys)
+    return keys[order], np.array(values, dtype=np.uint16)[order]
+
+
+def _build_flush_table(class_values):
+    table = np.full(1 << 13, WORST_RANK + 1, dtype=np.uint16)
+    for mask in range(1 << 13):
+        if bin(mask).count('1') < 5:
+            continue
+        high = _straight_high(mask)
+        if high >= 0:
+            table[mask] = class_values['straight_flush'][high]
+        else:
+            top5 = tuple([r for r in range(12, -1, -1) if mask >> r & 1][:5])
+            table[mask] = class_values['flush'][top5]
+    return table
+
+
+def _build_hand_info(class_values):
+    """
+    Tabla fuerza -> categoría 1..9 (9 = escalera de color ... 1 = carta alta)
+    y hasta 5 desempates con ranks 2..14 (0 = sin desempate), como array
+    uint8 (WORST_RANK + 1, 6); la fila 0 no se usa.
+    """
+    categories = [
+        ('straight_flush', 9), ('quads', 8), ('full_house', 7), ('flush', 6),
+        ('straight', 5), ('trips', 4), ('two_pair', 3), ('pair', 2), ('high_card', 1)
+    ]
+    info = np.zeros((WORST_RANK + 1, 6), dtype=np.uint8)
+    for name, category in categories:
+        for key, value in class_values[name].items():
+            key = key if isinstance(key, tuple) else (key,)
+            row = info[WORST_RANK + 1 - value]
+            row[0] = category
+            row[1:1 + len(key)] = [r + 2 for r in key]
+    return info
+
+
+# ------------------------------------------
+# Tablas base en disco (mmap)
+# ------------------------------------------
+# Construirlas en Python cuesta ~1 s; se generan offline con
+# build_hand_tables.py (los ficheros van en el repositorio) y cada proceso
+# las abre con mmap, de modo que importar no recalcula nada y los procesos
+# comparten las páginas. Importar nunca escribe ficheros.
+_TABLE_DIR = os.path.dirname(os.path.abspath(__file__))
+HAND_TABLE_FILES = {
+    'nf_keys': 'hand_nf_keys.npy',      # claves base 5 ordenadas (manos de 5 a 7 cartas)
+    'nf_values': 'hand_nf_values.npy',  # valor sin color de cada clave
+    'flush': 'hand_flush.npy',          # máscara de ranks del palo -> valor de color
+    'info': 'hand_info.npy',            # fuerza -> categoría y desempates
+}
+
+
+def _compute_hand_tables():
+    class_values = _build_class_values()
+    nf_keys, nf_values = _build_non_flush_table(class_values)
+    return {
+        'nf_keys': nf_keys,
+        'nf_values': nf_values,
+        'flush': _build_flush_table(class_values),
+        'info': _build_hand_info(class_values),
+    }
+
+
+def _save_atomic(path, array):
+    """
+    Escribe en un temporal único del mismo directorio y lo renombra: otro
+    proceso nunca ve un fichero a medio escribir ni comparte el temporal.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.npy')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def build_hand_tables(directory=_TABLE_DIR):
+    """Genera las tablas base y las guarda en directory."""
+    tables = _compute_hand_tables()
+    for name, filename in HAND_TABLE_FILES.items():
+        _save_atomic(os.path.join(directory, filename), tables[name])
+    return tables
+
+
+def _load_hand_tables(directory=_TABLE_DIR):
+    """
+    Tablas base abiertas con mmap. Si faltan o no se pueden leer, se
+    calculan en memoria (sin escribir nada).
+    """
+    paths = {name: os.path.join(directory, f) for name, f in HAND_TABLE_FILES.items()}
+    try:
+        return {name: np.load(p, mmap_mode='r') for name, p in paths.items()}
+    except (OSError, ValueError, EOFError):
+        return _compute_hand_tables()
+
+
+_TABLES = _load_hand_tables()
+_NF_KEYS = _TABLES['nf_keys']
+_NF_VALUES = _TABLES['nf_values']
+_FLUSH_TABLE = _TABLES['flush']
+_HAND_INFO = _TABLES['info']
+
+
+# ------------------------------------------
+# Tabla densa de 7 cartas en disco (mmap)
+# ------------------------------------------
+# Claves por rank cuya suma es única para cada multiconjunto de 7 ranks: la
+# parte sin color de cualquier mano de 7 cartas es un acceso directo a una
+# tabla uint16 de ~7.8M entradas (~15 MB). El fichero se genera una vez con
+# build_hand_tables.py (no va en el repositorio) y se abre con mmap, así que
+# todos los procesos (workers de gunicorn, pool de equity, entrenamiento)
+# comparten las mismas páginas físicas.
+RANK_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hand_rank7.npy')
+
+_DENSE_RANK_KEY = np.array(
+    [0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181], dtype=np.int64
+)
+_DENSE_TABLE_SIZE = int(_DENSE_RANK_KEY[12] * 4 + _DENSE_RANK_KEY[11] * 3) + 1
+
+_dense_table = None
+_dense_checked = False
+
+
+def build_rank_table(path=RANK_TABLE_FILE):
+    """Genera la tabla densa de 7 cartas (valores sin color) y la guarda en path."""
+    class_values = _build_class_values()
+    table = np.zeros(_DENSE_TABLE_SIZE, dtype=np.uint16)
+    for counts in _count_vectors(7):
+        table[int(np.dot(counts, _DENSE_RANK_KEY))] = _best_non_flush(counts, class_values)
+    _save_atomic(path, table)
+    return table
+
+
+def dense_rank_table(path=RANK_TABLE_FILE):
+    """
+    Tabla densa abierta con mmap en el primer uso. Devuelve None si no se ha
+    generado o no se puede abrir; entonces se usa la búsqueda binaria sobre
+    _NF_KEYS (o el dict de la vía escalar).
+    """
+    global _dense_table, _dense_checked
+    if not _dense_checked:
+        _dense_checked = True
+        try:
+            _dense_table = np.load(path, mmap_mode='r')
+            if _dense_table.shape != (_DENSE_TABLE_SIZE,):
+                _dense_table = None
+        except (OSError, ValueError, EOFError):
+            _dense_table = None
+    return _dense_table
+
+
+def _non_flush_values(ranks, prefix_size=0, key=0, dense_key=0):
+    """
+    Valor sin color de cada fila de ranks (0..12), sumando la parte ya
+    acumulada de un prefijo de prefix_size cartas (key en base 5, dense_key
+    en claves densas). Las manos de 7 cartas van a la tabla densa si existe.
+    """
+    if prefix_size + ranks.shape[1] == 7:
+        table = dense_rank_table()
+        if table is not None:
+            return table[dense_key + _DENSE_RANK_KEY[ranks].sum(axis=1)]
+    return _NF_VALUES[np.searchsorted(_NF_KEYS, key + _RANK_POW[ranks].sum(axis=1))]
+
+
+# ------------------------------------------
+# API de evaluación
+# ------------------------------------------
+def evaluate_batch(cards):
+    """
+    cards: array (N, n) de índices 0..51 con 5 <= n <= 7.
+    Devuelve un array (N,) con el valor de cada mano (menor = mejor).
+    """
+    cards = np.asarray(cards, dtype=np.int64)
+    ranks = cards % 13
+    suits = cards // 13
+
+    values = _non_flush_values(ranks)
+
+    bits = _RANK_BIT[ranks]
+    for s in range(4):
+        in_suit = suits == s
+        flush_rows = in_suit.sum(axis=1) >= 5
+        if flush_rows.any():
+            mask = (bits[flush_rows] * in_suit[flush_rows]).sum(axis=1)
+            values[flush_rows] = np.minimum(values[flush_rows], _FLUSH_TABLE[mask])
+    return values
+
+
+# ------------------------------------------
+# Vía rápida escalar (sin NumPy, para una sola mano)
+# ------------------------------------------
+_FLUSH_LIST = _FLUSH_TABLE.tolist()
+_CARD_KEY = [5 ** (c % 13) for c in range(NUM_CARDS)]
+_CARD_DENSE_KEY = [int(_DENSE_RANK_KEY[c % 13]) for c in range(NUM_CARDS)]
+_CARD_BIT = [1 << (c % 13) for c in range(NUM_CARDS)]
+
+_nf_lookup = None
+
+
+def _non_flush_lookup():
+    """
+    dict clave base 5 -> valor sin color para las manos que no van a la tabla
+    densa (5 y 6 cartas, o 7 si la tabla densa no está disponible). Se crea
+    en el primer uso a partir de las tablas mapeadas.
+    """
+    global _nf_lookup
+    if _nf_lookup is None:
+        _nf_lookup = dict(zip(_NF_KEYS.tolist(), _NF_VALUES.tolist()))
+    return _nf_lookup
+
+
+def value_from_parts(key, suit_counts, suit_bits, dense_key=None):
+    """
+    Valor de una mano de 5 a 7 cartas a partir de su resumen: clave de ranks
+    en base 5, conteo por palo y máscara de ranks por palo. dense_key (solo
+    para manos de exactamente 7 cartas) lleva la parte sin color a la tabla
+    densa compartida; key solo se usa si esa tabla no está disponible.
+    """
+    table = None
+    if dense_key is not None:
+        table = _dense_table if _dense_checked else dense_rank_table()
+    if table is not None:
+        value = table.item(dense_key)
+    else:
+        value = _non_flush_lookup()[key]
+    for s in range(4):
+        if suit_counts[s] >= 5:
+            return min(value, _FLUSH_LIST[suit_bits[s]])
+    return value
+
+
+def evaluate(cards):
+    """
+    Valor de una sola mano de 5 a 7 cartas enteras (menor = mejor).
+    Equivale a evaluate_batch([cards])[0] pero con enteros de Python, mucho
+    más rápido para una mano suelta; las de 7 cartas usan la tabla densa.
+    """
+    dense = len(cards) == 7 and (_dense_table if _dense_checked else dense_rank_table()) is not None
+    card_key = _CARD_DENSE_KEY if dense else _CARD_KEY
+    key = 0
+    suit_bits = [0, 0, 0, 0]
+    suit_count = [0, 0, 0, 0]
+    for c in cards:
+        key += card_key[c]
+        s = c // 13
+        suit_bits[s] |= _CARD_BIT[c]
+        suit_count[s] += 1
+    if dense:
+        return value_from_parts(None, suit_count, suit_bits, dense_key=key)
+    return value_from_parts(key, suit_count, suit_bits)
+
+
+# ------------------------------------------
+# Fuerza de mano (mayor = mejor) y desglose por categoría
+# ------------------------------------------
+def hand_strength(cards):
+    """Fuerza 1..7462 de una mano de 5 a 7 cartas, comparable con < (mayor = mejor)."""
+    return WORST_RANK + 1 - evaluate(cards)
+
+
+def hand_info(strength):
+    """(categoría, desempates) de una fuerza devuelta por hand_strength."""
+    row = _HAND_INFO[strength].tolist()
+    return row[0], tuple(r for r in row[1:] if r)
+
+
+# ------------------------------------------
+# Evaluación con prefijo de board precalculado
+# ------------------------------------------
+class BoardPrefix:
+    """
+    Estado parcial de un board fijo (clave de ranks, bits y conteo por palo),
+    calculado una sola vez. evaluate() puntúa muchas manos que comparten ese
+    board añadiendo solo sus cartas propias.
+    """
+
+    def __init__(self, board):
+        board = np.asarray(board, dtype=np.int64)
+        ranks = board % 13
+        suits = board // 13
+        self.size = len(board)
+        self.key = int(_RANK_POW[ranks].sum())
+        self.dense_key = int(_DENSE_RANK_KEY[ranks].sum())
+        self.suit_counts = np.bincount(suits, minlength=4)
+        self.suit_bits = np.array(
+            [int(_RANK_BIT[ranks[suits == s]].sum()) for s in range(4)], dtype=np.int64
+        )
+
+    def evaluate(self, extra):
+        """
+        extra: array (N, m) con las cartas que completan cada mano
+        (5 <= size + m <= 7). Devuelve (N,) con el valor de cada mano.
+        """
+        extra = np.asarray(extra, dtype=np.int64)
+        ranks = extra % 13
+        suits = extra // 13
+
+        values = _non_flush_values(ranks, self.size, self.key, self.dense_key)
+
+        m = extra.shape[1]
+        bits = _RANK_BIT[ranks]
+        for s in np.flatnonzero(self.suit_counts + m >= 5):
+            in_suit = suits == s
+            flush_rows = self.suit_counts[s] + in_suit.sum(axis=1) >= 5
+            if flush_rows.any():
+                mask = self.suit_bits[s] | (bits[flush_rows] * in_suit[flush_rows]).sum(axis=1)
+                values[flush_rows] = np.minimum(values[flush_rows], _FLUSH_TABLE[mask])
+        return values
+
+
+def score_holdings(board, holdings):
+    """Puntúa todas las manos de 2 cartas (K, 2) sobre un mismo board."""
+    return BoardPrefix(board).evaluate(holdings)
+
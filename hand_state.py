@@ -0,0 +1,122 @@
+# hand_state.py
+# Estado incremental de la mano de un jugador: absorbe las cartas del board
+# calle a calle y responde fuerza y proyectos en O(1), sin reevaluar desde cero.
+
+from bitboards import _CONNECTEDNESS, _STRAIGHT_CLASS, _STRAIGHT_DRAW
+from cards import rank_of, suit_of
+from hand_evaluator import _DENSE_RANK_KEY, WORST_RANK, value_from_parts
+
+_DENSE_KEY = _DENSE_RANK_KEY.tolist()
+
+
+class HandState:
+    """
+    Cartas propias + board visible de un jugador, resumidas en conteos y
+    máscaras (claves de ranks base 5 y densa, conteo y bits por palo, bits
+    de ranks).
+    add_board() se llama con cada carta nueva del board; las propiedades
+    no recorren las cartas.
+    """
+
+    __slots__ = ('hole', 'board', 'key', 'dense_key', 'suit_counts', 'suit_bits', 'rank_bits',
+                 'board_suit_counts', 'board_rank_bits', 'board_paired')
+
+    def __init__(self, hole, board=()):
+        self.hole = tuple(hole)
+        self.board = []
+        self.key = 0
+        self.dense_key = 0
+        self.suit_counts = [0, 0, 0, 0]
+        self.suit_bits = [0, 0, 0, 0]
+        self.rank_bits = 0
+        self.board_suit_counts = [0, 0, 0, 0]
+        self.board_rank_bits = 0
+        self.board_paired = False
+        for c in self.hole:
+            self._absorb(c)
+        self.extend_board(board)
+
+    def _absorb(self, card):
+        r, s = card % 13, card // 13
+        self.key += 5 ** r
+        self.dense_key += _DENSE_KEY[r]
+        self.suit_counts[s] += 1
+        self.suit_bits[s] |= 1 << r
+        self.rank_bits |= 1 << r
+
+    def add_board(self, card):
+        self._absorb(card)
+        bit = 1 << (card % 13)
+        if self.board_rank_bits & bit:
+            self.board_paired = True
+        self.board_rank_bits |= bit
+        self.board_suit_counts[card // 13] += 1
+        self.board.append(card)
+
+    def extend_board(self, cards):
+        for c in cards:
+            self.add_board(c)
+
+    def copy(self):
+        other = HandState.__new__(HandState)
+        other.hole = self.hole
+        other.board = list(self.board)
+        other.key = self.key
+        other.dense_key = self.dense_key
+        other.suit_counts = list(self.suit_counts)
+        other.suit_bits = list(self.suit_bits)
+        other.rank_bits = self.rank_bits
+        other.board_suit_counts = list(self.board_suit_counts)
+        other.board_rank_bits = self.board_rank_bits
+        other.board_paired = self.board_paired
+        return other
+
+    # --------------------------------------------------
+    # Fuerza
+    # --------------------------------------------------
+    @property
+    def value(self):
+        """Valor en la escala de treys (1 = mejor); None con menos de 5 cartas."""
+        if len(self.board) < 3:
+            return None
+        # Con el board completo (7 cartas) la parte sin color sale de la tabla densa
+        dense_key = self.dense_key if len(self.board) == 5 else None
+        return value_from_parts(self.key, self.suit_counts, self.suit_bits, dense_key)
+
+    @property
+    def strength(self):
+        """Fuerza 1..7462 (mayor = mejor), igual que hand_evaluator.hand_strength."""
+        value = self.value
+        return None if value is None else WORST_RANK + 1 - value
+
+    # --------------------------------------------------
+    # Proyectos y textura (mismos criterios que las funciones antiguas)
+    # --------------------------------------------------
+    @property
+    def flush_draw(self):
+        """1 si algún palo de las cartas propias aparece ≥2 veces en el board."""
+        for c in self.hole:
+            if self.board_suit_counts[suit_of(c)] >= 2:
+                return 1
+        return 0
+
+    @property
+    def straight_draw(self):
+        return _STRAIGHT_DRAW[self.rank_bits]
+
+    @property
+    def straight_class(self):
+        """bitboards.NO_DRAW / GUTSHOT / OPEN_ENDED / STRAIGHT."""
+        return _STRAIGHT_CLASS[self.rank_bits]
+
+    @property
+    def connectedness(self):
+        if len(self.board) < 3:
+            return 0.0
+        return _CONNECTEDNESS[self.board_rank_bits]
+
+    @property
+    def pocket_pair_hit(self):
+        """Pocket pair con al menos una carta de su rank en el board (set)."""
+        r1, r2 = rank_of(self.hole[0]), rank_of(self.hole[1])
+        return r1 == r2 and bool(self.board_rank_bits >> (r1 - 2) & 1)
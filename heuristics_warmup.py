@@ -13,6 +13,9 @@ from rangos import (
     suggest_bet_size
 )
 from bucket_features import real_equity_estimate
+from cards import rank_of, suit_of, to_index, to_indices
+from bitboards import flush_draw
+from board_texture import flop_texture
 
 # --------------------------------------------
 # Util para notación de manos “AKs”, “99”, “72o”
@@ -21,19 +24,14 @@ _RANK_ORDER = "23456789TJQKA"
 
 def hole_to_notation(hole):
     """
-    hole: lista/tupla de 2 cartas (string 'As' o tupla (14,1)).
+    hole: lista/tupla de 2 cartas (entero 0..51, string 'As' o tupla (14,1)).
     Devuelve “AKs”, “99”, “72o”, etc.
     """
-    if isinstance(hole[0], str):
-        r1, s1 = hole[0][0], hole[0][1]
-        r2, s2 = hole[1][0], hole[1][1]
-    else:
-        rank_int1, suit_int1 = hole[0]
-        rank_int2, suit_int2 = hole[1]
-        r1 = _RANK_ORDER[rank_int1 - 2]
-        r2 = _RANK_ORDER[rank_int2 - 2]
-        s1 = suit_int1
-        s2 = suit_int2
+    c1, c2 = to_index(hole[0]), to_index(hole[1])
+    r1 = _RANK_ORDER[rank_of(c1) - 2]
+    r2 = _RANK_ORDER[rank_of(c2) - 2]
+    s1 = suit_of(c1)
+    s2 = suit_of(c2)
 
     if _RANK_ORDER.index(r1) > _RANK_ORDER.index(r2):
         high, low = r1, r2
@@ -127,67 +125,37 @@ def evaluate_pocket_pair(hole, community):
     """
     Devuelve True si hole es pocket-pair y hay al menos una carta del mismo rank en community.
     """
-    if isinstance(hole[0], str):
-        r1 = hole[0][0]
-        r2 = hole[1][0]
-    else:
-        r1 = _RANK_ORDER[hole[0][0] - 2]
-        r2 = _RANK_ORDER[hole[1][0] - 2]
+    r1 = rank_of(to_index(hole[0]))
+    r2 = rank_of(to_index(hole[1]))
 
     if r1 != r2:
         return False
 
     for c in community:
-        if isinstance(c, str):
-            if c[0] == r1:
-                return True
-        else:
-            r_comm = _RANK_ORDER[c[0] - 2]
-            if r_comm == r1:
-                return True
+        if rank_of(to_index(c)) == r1:
+            return True
     return False
 
 def has_flush_draw(hole, community):
     """
-    Detecta proyecto de color: al menos 2 del mismo palo en hole y ≥2 en community.
+    Detecta proyecto de color: algún palo de hole aparece ≥2 veces en community.
     """
-    suits_h = [c[1] for c in hole]
-    suits_b = [c[1] for c in community]
-    for s in suits_h:
-        if suits_b.count(s) >= 2:
-            return True
-    return False
+    return bool(flush_draw(to_indices(hole), to_indices(community)))
 
 def determine_board_texture(community):
     """
-    Retorna 'dry', 'wet' o 'neutral' según las primeras 3 cartas del board.
+    Retorna 'dry', 'wet' o 'neutral' según las primeras 3 cartas del board
+    (consulta en la tabla de flops de board_texture).
     """
-    if len(community) < 3:
-        return "neutral"
-    ranks = []
-    suits = []
-    for c in community[:3]:
-        if isinstance(c, str):
-            ranks.append(_RANK_ORDER.index(c[0]))
-            suits.append(c[1])
-        else:
-            ranks.append(c[0] - 2)
-            suits.append(c[1])
-    unique_suits = set(suits)
-    for s in unique_suits:
-        if suits.count(s) >= 2:
-            return "wet"
-    sorted_ranks = sorted(ranks)
-    if sorted_ranks[2] - sorted_ranks[0] <= 4:
-        return "wet"
-    return "dry"
+    return flop_texture([to_index(c) for c in community[:3]])
 
 def postflop_heuristic_action(gs):
     hole = gs.hole_cards[gs.to_act]
     community = gs.community_cards
+    state = gs.hand_states[gs.to_act]
 
     # 1) Si es pocket-pair y conectó set/trío
-    if evaluate_pocket_pair(hole, community):
+    if state.pocket_pair_hit:
         in_3bet_pot = ('r' in gs.history and gs.history.count('r') >= 2)
         texture = determine_board_texture(community)
         bs_low, bs_high = suggest_bet_size(
@@ -200,7 +168,7 @@ def postflop_heuristic_action(gs):
         return Action.RAISE_SMALL
 
     # 2) Flush draw
-    if has_flush_draw(hole, community):
+    if state.flush_draw:
         to_call = gs.current_bet - (
             gs.player_current_bet if gs.to_act == 0 else gs.bot_current_bet
         )
@@ -241,14 +209,10 @@ def has_nut_blocker(hole, community):
     """
     True si el board ya tiene 4 cartas de un mismo palo y hole contiene As de ese palo.
     """
-    suits_community = [c[1] for c in community]
+    suits_community = [suit_of(to_index(c)) for c in community]
     for c in hole:
-        if isinstance(c, str):
-            r, s = c[0], c[1]
-        else:
-            r = _RANK_ORDER[c[0] - 2]
-            s = c[1]
-        if suits_community.count(s) == 4 and r == "A":
+        c = to_index(c)
+        if suits_community.count(suit_of(c)) == 4 and rank_of(c) == 14:
             return True
     return False
 
@@ -4,10 +4,12 @@ import random
 import numpy as np
 from itertools import combinations
 from enum import Enum
-from treys import Card, Evaluator
+from cards import to_str, to_tuple
+from hand_evaluator import evaluate
+from hand_state import HandState
+from bucketing import as_assigner
 
 INITIAL_STACK = 1000
-_evaluator = Evaluator()
 
 class Action(Enum):
     FOLD = 0
@@ -19,31 +21,23 @@ class Action(Enum):
 NUM_ACTIONS = len(Action)
 
 def create_deck():
-    ranks = list(range(2, 15))  # 2..14 (14=As)
-    suits = list(range(4))      # 0=spades, 1=hearts, 2=diamonds, 3=clubs
-    return [(r, s) for s in suits for r in ranks]
+    # Cartas enteras 0..51 = suit * 13 + (rank - 2), ver cards.py
+    return list(range(52))
 
 def rank_suit_to_str(card):
-    rank_map = {14: 'A', 13: 'K', 12: 'Q', 11: 'J', 10: 'T'}
-    suit_map = {0: 's', 1: 'h', 2: 'd', 3: 'c'}
-    r = rank_map.get(card[0], str(card[0]))
-    s = suit_map[card[1]]
-    return r + s
+    return to_str(card)
 
 def cards_str(cards):
     return ' '.join(rank_suit_to_str(c) for c in cards)
 
-def card_list_to_treys(cards):
-    return [Card.new(rank_suit_to_str(c)) for c in cards]
-
 def evaluate_hand(hole_cards, community_cards):
-    board = card_list_to_treys(community_cards)
-    hand = card_list_to_treys(hole_cards)
-    return _evaluator.evaluate(board, hand)
+    # Escala de treys (1 = mejor), evaluada por tablas en hand_evaluator
+    return evaluate(list(hole_cards) + list(community_cards))
 
 def get_winner(gs):
-    s0 = evaluate_hand(gs.hole_cards[0], gs.community_cards)
-    s1 = evaluate_hand(gs.hole_cards[1], gs.community_cards)
+    # El estado incremental de cada jugador ya tiene el board completo
+    s0 = gs.hand_states[0].value
+    s1 = gs.hand_states[1].value
     if s0 < s1:
         return 0
     if s1 < s0:
@@ -53,10 +47,10 @@ def get_winner(gs):
 def hand_to_features(hole_cards, community_cards, bet_size, history, to_act, pot):
     f = []
     for c in hole_cards:
-        f.extend(c)
+        f.extend(to_tuple(c))
     for i in range(5):
         if i < len(community_cards):
-            f.extend(community_cards[i])
+            f.extend(to_tuple(community_cards[i]))
         else:
             f.extend([0, 0])
     f.append(bet_size)
@@ -82,6 +76,9 @@ class GameState:
         self.bet = {0: bet0, 1: bet1}
         self.dealer = dealer
         self.deck = deck
+        # Resumen incremental de la mano de cada jugador (ver hand_state.py)
+        self.hand_states = {0: HandState(hole0, self.community_cards),
+                            1: HandState(hole1, self.community_cards)}
 
     def is_terminal(self):
         if 'f' in self.history:
@@ -124,6 +121,9 @@ class GameState:
                 new_community.append(self.deck[7])
             elif next_phase == 'river' and len(new_community) < 5:
                 new_community.append(self.deck[8])
+            for c in new_community[len(self.community_cards):]:
+                self.hand_states[0].add_board(c)
+                self.hand_states[1].add_board(c)
             self.phase = next_phase
             self.community_cards = new_community
             self.bet = {0: 0, 1: 0}
@@ -178,4 +178,4 @@ def get_bucket(kmeans_model, hole_cards, community_cards,
                bet_size, history='', to_act=0, pot=0):
     feats = hand_to_features(hole_cards, community_cards,
                               bet_size, history, to_act, pot)
-    return kmeans_model.predict(feats.reshape(1, -1))[0]
+    return as_assigner(kmeans_model).assign(feats)
@@ -3,12 +3,41 @@
 import random
 import pickle
 import numpy as np
-from itertools import combinations
 from enum import Enum
 
 from poker_env import Action, NUM_ACTIONS
-from bucket_features import hand_to_features_enhanced  # Importamos la función mejorada
-from bucket_features import real_equity_estimate       # Importamos la función de equity
+from equity_engine import EquitySession               # Equity con muestra común por decisión
+from cards import cards_to_ui, make_card, rank_of, suit_of, to_ui
+from hand_evaluator import WORST_RANK, hand_info, hand_strength
+from hand_state import HandState
+
+# ------------------------------------------
+# Descripción de jugadas, precalculada por fuerza de mano
+# ------------------------------------------
+def _describe(hr, ts):
+    if hr == 9:
+        return f"Escalera de color a la {ts[0]}"
+    elif hr == 8:
+        return f"Poker de {ts[0]} con kicker {ts[1]}"
+    elif hr == 7:
+        return f"Full House: triple de {ts[0]} y pareja de {ts[1]}"
+    elif hr == 6:
+        return f"Color con {', '.join(map(str, ts))}"
+    elif hr == 5:
+        return f"Escalera a la {ts[0]}"
+    elif hr == 4:
+        return f"Trío de {ts[0]} con kickers {ts[1]}, {ts[2]}"
+    elif hr == 3:
+        return f"Dobles parejas de {ts[0]} y {ts[1]} con kicker {ts[2]}"
+    elif hr == 2:
+        return f"Pareja de {ts[0]} con kickers {', '.join(map(str, ts[1:]))}"
+    elif hr == 1:
+        return f"Carta alta {ts[0]} con kickers {', '.join(map(str, ts[1:]))}"
+    return ""
+
+
+_HAND_DESCRIPTIONS = [""] + [_describe(*hand_info(v)) for v in range(1, WORST_RANK + 1)]
+
 
 class PokerGame:
     def __init__(self, player_chips=None, bot_chips=None, initial_stack=1000, small_blind=10, big_blind=20):
@@ -45,6 +74,10 @@ class PokerGame:
         self.bot_hole = []
         self.community_cards = []
 
+        # Estado incremental de cada mano (cartas propias + board visible)
+        self.player_state = None
+        self.bot_state = None
+
         # Ronda actual: 0=preflop, 1=flop, 2=turn, 3=river, 4=showdown
         self.street_index = 0
 
@@ -52,10 +85,12 @@ class PokerGame:
         self.history = ""
 
     # --- Construye y baraja ---
+    # Las cartas son enteros 0..51 (cards.py); solo se pasan a 'QC', 'AS'...
+    # al mostrarlas (consola, logs y respuestas de Flask).
     def build_deck(self):
-        suits = ["H", "D", "C", "S"]
-        ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "T", "J", "Q", "K", "A"]
-        return [r + s for s in suits for r in ranks]
+        suits = [1, 2, 3, 0]            # H, D, C, S
+        ranks = list(range(2, 15))
+        return [make_card(r, s) for s in suits for r in ranks]
 
     def shuffle_deck(self):
         self.deck = self.build_deck()
@@ -66,6 +101,15 @@ class PokerGame:
         self.player_hole = [self.deck.pop(), self.deck.pop()]
         self.bot_hole = [self.deck.pop(), self.deck.pop()]
         self.community_cards = [self.deck.pop() for _ in range(5)]
+        self.player_state = HandState(self.player_hole)
+        self.bot_state = HandState(self.bot_hole)
+
+    def _sync_hand_states(self):
+        # Absorbe en ambos estados solo las cartas comunitarias recién visibles
+        visible = (0, 3, 4, 5, 5)[self.street_index]
+        for c in self.community_cards[len(self.bot_state.board):visible]:
+            self.player_state.add_board(c)
+            self.bot_state.add_board(c)
 
     # --- Publicar blinds ---
     def post_blinds(self):
@@ -199,7 +243,7 @@ class PokerGame:
 
         print("\n=== Nueva mano ===")
         print(f"Dealer: {self.dealer.upper()}")
-        print("Tus cartas:", self.player_hole)
+        print("Tus cartas:", cards_to_ui(self.player_hole))
         return True
 
     # --- Aplicar acción de jugador o bot ---
@@ -299,13 +343,14 @@ class PokerGame:
         self.player_current_bet = 0
         self.bot_current_bet = 0
         self.history = ""
+        self._sync_hand_states()
 
         if self.street_index == 1:
-            print("\nFlop:", self.community_cards[:3])
+            print("\nFlop:", cards_to_ui(self.community_cards[:3]))
         elif self.street_index == 2:
-            print("\nTurn:", self.community_cards[3])
+            print("\nTurn:", to_ui(self.community_cards[3]))
         elif self.street_index == 3:
-            print("\nRiver:", self.community_cards[4])
+            print("\nRiver:", to_ui(self.community_cards[4]))
         elif self.street_index == 4:
             print("\nShowdown!")
 
@@ -313,119 +358,33 @@ class PokerGame:
 
     # --- Evaluación simple de manos ---
     def get_rank(self, card):
-        rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6,
-                       '7': 7, '8': 8, '9': 9, 'T': 10, 'J': 11,
-                       'Q': 12, 'K': 13, 'A': 14}
-        return rank_values[card[0]]
+        return rank_of(card)
 
     def get_suit(self, card):
-        return card[-1]
-
-    def evaluate_five_card_hand(self, cards):
-        ranks = sorted([self.get_rank(c) for c in cards], reverse=True)
-        suits = [self.get_suit(c) for c in cards]
-        rank_counts = {}
-        for r in ranks:
-            rank_counts[r] = rank_counts.get(r, 0) + 1
-        counts = sorted(
-            [(r, cnt) for r, cnt in rank_counts.items()],
-            key=lambda x: (x[1], x[0]), reverse=True
-        )
-        is_flush = all(s == suits[0] for s in suits)
-        unique_ranks = sorted(set(ranks), reverse=True)
-        is_straight = False
-        straight_high = None
-        if len(unique_ranks) >= 5:
-            for i in range(len(unique_ranks) - 4):
-                if unique_ranks[i] - unique_ranks[i + 4] == 4:
-                    is_straight = True
-                    straight_high = unique_ranks[i]
-                    break
-            if not is_straight and {14, 5, 4, 3, 2}.issubset(unique_ranks):
-                is_straight = True
-                straight_high = 5
-        if is_flush and is_straight:
-            return {"handRank": 9, "tiebreakers": [straight_high]}
-        if counts[0][1] == 4:
-            fourRank = counts[0][0]
-            kicker = max(r for r in ranks if r != fourRank)
-            return {"handRank": 8, "tiebreakers": [fourRank, kicker]}
-        if counts[0][1] == 3 and len(counts) > 1 and counts[1][1] >= 2:
-            return {"handRank": 7, "tiebreakers": [counts[0][0], counts[1][0]]}
-        if is_flush:
-            flush_ranks = sorted(
-                [self.get_rank(c) for c in cards if self.get_suit(c) == suits[0]],
-                reverse=True
-            )
-            return {"handRank": 6, "tiebreakers": flush_ranks[:5]}
-        if is_straight:
-            return {"handRank": 5, "tiebreakers": [straight_high]}
-        if counts[0][1] == 3:
-            triple = counts[0][0]
-            kickers = sorted([r for r in ranks if r != triple], reverse=True)[:2]
-            return {"handRank": 4, "tiebreakers": [triple] + kickers}
-        if counts[0][1] == 2 and len(counts) > 1 and counts[1][1] == 2:
-            highPair = max(counts[0][0], counts[1][0])
-            lowPair = min(counts[0][0], counts[1][0])
-            kicker = max(r for r in ranks if r != highPair and r != lowPair)
-            return {"handRank": 3, "tiebreakers": [highPair, lowPair, kicker]}
-        if counts[0][1] == 2:
-            pair = counts[0][0]
-            kickers = sorted([r for r in ranks if r != pair], reverse=True)[:3]
-            return {"handRank": 2, "tiebreakers": [pair] + kickers}
-        return {"handRank": 1, "tiebreakers": ranks[:5]}
+        return suit_of(card)
 
     def evaluate_hand7(self, cards):
-        best_eval = None
-        for combo in combinations(cards, 5):
-            eval_combo = self.evaluate_five_card_hand(list(combo))
-            if best_eval is None or self.compare_hands(eval_combo, best_eval) > 0:
-                best_eval = eval_combo
-        return best_eval
+        # Fuerza entera de la mejor mano (mayor = mejor), por tablas
+        return hand_strength(cards)
 
     def compare_hands(self, handA, handB):
-        if handA["handRank"] > handB["handRank"]:
+        if handA > handB:
             return 1
-        if handA["handRank"] < handB["handRank"]:
+        if handA < handB:
             return -1
-        for a, b in zip(handA["tiebreakers"], handB["tiebreakers"]):
-            if a > b:
-                return 1
-            if a < b:
-                return -1
         return 0
 
-    def describe_hand(self, best_eval):
-        ts = best_eval["tiebreakers"]
-        hr = best_eval["handRank"]
-        if hr == 9:
-            return f"Escalera de color a la {ts[0]}"
-        elif hr == 8:
-            return f"Poker de {ts[0]} con kicker {ts[1]}"
-        elif hr == 7:
-            return f"Full House: triple de {ts[0]} y pareja de {ts[1]}"
-        elif hr == 6:
-            return f"Color con {', '.join(map(str, ts))}"
-        elif hr == 5:
-            return f"Escalera a la {ts[0]}"
-        elif hr == 4:
-            return f"Trío de {ts[0]} con kickers {ts[1]}, {ts[2]}"
-        elif hr == 3:
-            return f"Dobles parejas de {ts[0]} y {ts[1]} con kicker {ts[2]}"
-        elif hr == 2:
-            return f"Pareja de {ts[0]} con kickers {', '.join(map(str, ts[1:]))}"
-        elif hr == 1:
-            return f"Carta alta {ts[0]} con kickers {', '.join(map(str, ts[1:]))}"
-        return ""
+    def describe_hand(self, strength):
+        return _HAND_DESCRIPTIONS[strength]
 
     def showdown(self):
         print("\n--- Showdown ---")
-        print("Tus cartas:", self.player_hole, "+ Comunidad:", self.community_cards)
-        print("Cartas del bot:", self.bot_hole, "+ Comunidad:", self.community_cards)
+        print("Tus cartas:", cards_to_ui(self.player_hole), "+ Comunidad:", cards_to_ui(self.community_cards))
+        print("Cartas del bot:", cards_to_ui(self.bot_hole), "+ Comunidad:", cards_to_ui(self.community_cards))
 
         # 1) Evaluar mejor mano de 7 cartas
-        player_best = self.evaluate_hand7(self.player_hole + self.community_cards)
-        bot_best = self.evaluate_hand7(self.bot_hole + self.community_cards)
+        player_best = self.player_state.strength
+        bot_best = self.bot_state.strength
 
         # 2) Mostrar jugadas
         print("Tu mejor jugada:", self.describe_hand(player_best))
@@ -467,69 +426,64 @@ class PokerGame:
     def reveal_remaining_community_cards(self):
         while self.street_index < 3:
             self.street_index += 1
+            self._sync_hand_states()
             if self.street_index == 1:
-                print("\nFlop:", self.community_cards[:3])
+                print("\nFlop:", cards_to_ui(self.community_cards[:3]))
             elif self.street_index == 2:
-                print("\nTurn:", self.community_cards[3])
+                print("\nTurn:", to_ui(self.community_cards[3]))
             elif self.street_index == 3:
-                print("\nRiver:", self.community_cards[4])
+                print("\nRiver:", to_ui(self.community_cards[4]))
         self.print_chip_counts()
 
     # --- Decide acción bot basado en modelo entrenado (con cap de tamaño según equity) ---
     def bot_decide_action(self, trainer):
-        rank_map = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6,
-                    '7': 7, '8': 8, '9': 9, 'T': 10, 'J': 11,
-                    'Q': 12, 'K': 13, 'A': 14}
-        suit_map = {'s': 0, 'h': 1, 'd': 2, 'c': 3,
-                    'S': 0, 'H': 1, 'D': 2, 'C': 3}
-
-        def convert_cards(cards_str_list):
-            return [(rank_map[c[0]], suit_map[c[1]]) for c in cards_str_list]
-
         phase_map = {0: 'preflop', 1: 'flop', 2: 'turn', 3: 'river'}
         phase = phase_map.get(self.street_index, 'river')
 
         # Obtener historial para bucket
         history_for_bucket = self.history.split('|')[-1] if '|' in self.history else self.history
-        km = trainer.kmeans_models.get(phase)
+        assigner = trainer.bucket_assigner(phase)
         nodes = trainer.nodes.get(phase, {})
 
-        # Convertir cartas a formato numérico
-        hole_cards_numeric = convert_cards(self.bot_hole)
+        # Cartas visibles en esta calle (ya en formato entero)
+        self._sync_hand_states()
+        hole_cards_numeric = list(self.bot_hole)
         if self.street_index == 0:
             community_numeric = []
         elif self.street_index == 1:
-            community_numeric = convert_cards(self.community_cards[:3])
+            community_numeric = self.community_cards[:3]
         elif self.street_index == 2:
-            community_numeric = convert_cards(self.community_cards[:4])
+            community_numeric = self.community_cards[:4]
         else:
-            community_numeric = convert_cards(self.community_cards[:5])
+            community_numeric = self.community_cards[:5]
 
         # Calcular cuánto debe pagar para hacer call
         to_call = self.current_bet - self.bot_current_bet
         pot_before = self.pot
 
+        # Una sola muestra de runouts para todos los chequeos de esta decisión
+        equity_session = EquitySession(hole_cards_numeric, community_numeric)
+
         # =========================
         #  A) Si debe pagar (to_call > 0):
         # =========================
         if to_call > 0:
-            # 1) Si la mesa está emparejada, forzamos equity = 0.50
-            ranks_board = [r for (r, s) in community_numeric]
-            if len(ranks_board) != len(set(ranks_board)):
-                eq_bot = 0.50
-            else:
-                eq_bot = real_equity_estimate(
-                    hole_cards_numeric,
-                    community_numeric,
-                    num_sim=500
-                )
-
-            # 2) Calcular pot odds
+            # 1) Calcular pot odds
             if pot_before + to_call > 0:
                 pot_odds = to_call / (pot_before + to_call)
             else:
                 pot_odds = 1.0
 
+            # 2) Si la mesa está emparejada, forzamos equity = 0.50
+            if self.bot_state.board_paired:
+                eq_bot = 0.50
+            else:
+                # Se simula solo hasta saber de qué lado de cada umbral cae la equity
+                eq_bot, _, _ = equity_session.adaptive(
+                    thresholds=[pot_odds, 0.65, 0.90],
+                    max_sims=500
+                )
+
             # 3) Si equity ≤ pot_odds → fold
             if eq_bot <= pot_odds:
                 return Action.FOLD, None
@@ -550,16 +504,17 @@ class PokerGame:
         # =========================
         #  B) Si to_call == 0 (abrir o check)
         # =========================
-        if km is not None and nodes is not None:
+        if assigner is not None and nodes is not None:
             # 1) Bucketizar + estrategia CFR
-            feats = hand_to_features_enhanced(
+            bucket = trainer.bucket(
+                phase,
                 hole_cards_numeric,
                 community_numeric,
                 pot=self.pot,
                 history=history_for_bucket,
-                to_act=1
+                to_act=1,
+                hand_state=self.bot_state
             )
-            bucket = km.predict(feats.reshape(1, -1))[0]
             info_set = f"{phase}|{bucket}|{history_for_bucket}"
             if info_set in nodes:
                 strat = nodes[info_set].get_average_strategy()
@@ -587,11 +542,6 @@ class PokerGame:
         if action in [Action.RAISE_SMALL, Action.RAISE_MEDIUM, Action.RAISE_LARGE] and raise_amount is not None:
             # Si sugerido > 40% del stack, forzamos revisión
             if raise_amount > self.bot_chips * 0.1:
-                eq_bot = real_equity_estimate(
-                    hole_cards_numeric,
-                    community_numeric,
-                    num_sim=2000
-                )
                 # Calcular “pot odds” aproximadas después de este raise
                 candidate_raise = raise_amount
                 if pot_before + candidate_raise > 0:
@@ -599,6 +549,11 @@ class PokerGame:
                 else:
                     pot_odds_after = 1.0
 
+                eq_bot, _, _ = equity_session.adaptive(
+                    thresholds=[pot_odds_after, 0.70, 0.90],
+                    max_sims=2000
+                )
+
                 # Si equity ≤ pot_odds_after → CALL
                 if eq_bot <= pot_odds_after:
                     action = Action.CALL
@@ -7,8 +7,8 @@ from itertools import combinations
 from enum import Enum
 
 from poker_env import Action, NUM_ACTIONS
-from bucket_features import hand_to_features_enhanced  # Importamos la función mejorada
 from bucket_features import real_equity_estimate       # Importamos la función de equity
+from cards import to_indices
 
 class PokerGame:
     def __init__(self, initial_stack=1000, small_blind=10, big_blind=20):
@@ -416,33 +416,24 @@ class PokerGame:
 
     # --- Decide acción bot basado en modelo entrenado (con cap de tamaño según equity) ---
     def bot_decide_action(self, trainer):
-        rank_map = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6,
-                    '7': 7, '8': 8, '9': 9, 'T': 10, 'J': 11,
-                    'Q': 12, 'K': 13, 'A': 14}
-        suit_map = {'s': 0, 'h': 1, 'd': 2, 'c': 3,
-                    'S': 0, 'H': 1, 'D': 2, 'C': 3}
-
-        def convert_cards(cards_str_list):
-            return [(rank_map[c[0]], suit_map[c[1]]) for c in cards_str_list]
-
         phase_map = {0: 'preflop', 1: 'flop', 2: 'turn', 3: 'river'}
         phase = phase_map.get(self.street_index, 'river')
 
         # Obtener historial para bucket
         history_for_bucket = self.history.split('|')[-1] if '|' in self.history else self.history
-        km = trainer.kmeans_models.get(phase)
+        assigner = trainer.bucket_assigner(phase)
         nodes = trainer.nodes.get(phase, {})
 
-        # Convertir cartas a formato numérico
-        hole_cards_numeric = convert_cards(self.bot_hole)
+        # Convertir cartas a enteros 0..51
+        hole_cards_numeric = to_indices(self.bot_hole)
         if self.street_index == 0:
             community_numeric = []
         elif self.street_index == 1:
-            community_numeric = convert_cards(self.community_cards[:3])
+            community_numeric = to_indices(self.community_cards[:3])
         elif self.street_index == 2:
-            community_numeric = convert_cards(self.community_cards[:4])
+            community_numeric = to_indices(self.community_cards[:4])
         else:
-            community_numeric = convert_cards(self.community_cards[:5])
+            community_numeric = to_indices(self.community_cards[:5])
 
         # Calcular cuánto debe pagar para hacer call
         to_call = self.current_bet - self.bot_current_bet
@@ -485,16 +476,16 @@ class PokerGame:
         # =========================
         #  B) Si to_call == 0 (abrir o check)
         # =========================
-        if km is not None and nodes is not None:
+        if assigner is not None and nodes is not None:
             # 1) Bucketizar + estrategia CFR
-            feats = hand_to_features_enhanced(
+            bucket = trainer.bucket(
+                phase,
                 hole_cards_numeric,
                 community_numeric,
                 pot=self.pot,
                 history=history_for_bucket,
                 to_act=1
             )
-            bucket = km.predict(feats.reshape(1, -1))[0]
             info_set = f"{phase}|{bucket}|{history_for_bucket}"
             if info_set in nodes:
                 strat = nodes[info_set].get_average_strategy()
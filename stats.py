@@ -4,6 +4,7 @@ import pickle
 
 from practica2 import Action  # Solo para constantes de acciones
 from bucket_features import real_equity_estimate
+from cards import to_index
 
 LOG_FILE = 'last_hand.log'
 CFR_MODEL_FILE = 'cfr_entreno.pkl'
@@ -268,16 +269,15 @@ def compute_metrics(parsed):
 
 
 def _convertir_cartas(cards_list):
-    rank_map = {'2':2,'3':3,'4':4,'5':5,'6':6,'7':7,'8':8,'9':9,'T':10,'J':11,'Q':12,'K':13,'A':14}
-    suit_map = {'s':0,'h':1,'d':2,'c':3,'S':0,'H':1,'D':2,'C':3}
+    """Cadenas del log ('QC', '7d'...) → cartas enteras 0..51 (se ignoran las inválidas)."""
     resultado = []
     for c in cards_list:
         c = c.strip().strip("'\"")
         if len(c) >= 2:
-            r = rank_map.get(c[0], None)
-            s = suit_map.get(c[1], None)
-            if r is not None and s is not None:
-                resultado.append((r, s))
+            try:
+                resultado.append(to_index(c[:2]))
+            except KeyError:
+                pass
     return resultado
 
 
@@ -314,12 +314,34 @@ def _get_pot_before(parsed, calle):
     return pot
 
 
-def compute_recommendations(parsed):
+def _equities_por_calle(parsed, equity_service=None):
+    """
+    Calcula de una vez la equity del jugador en cada calle donde hizo
+    CALL/CHECK o RAISE. Con equity_service las consultas van en un solo lote.
+    """
+    calles, queries = [], []
+    for calle in ('preflop', 'flop', 'turn', 'river'):
+        acciones_player = [a for a in parsed['acciones'][calle] if a['actor'] == 'player']
+        if not acciones_player or acciones_player[-1]['tipo'] not in ('call', 'check', 'raise'):
+            continue
+        hole_str, board_str = _cartas_y_tablero(parsed, calle)
+        calles.append(calle)
+        queries.append((_convertir_cartas(hole_str), _convertir_cartas(board_str), "balanced", 500))
+
+    if equity_service is not None:
+        eqs = equity_service.map(queries)
+    else:
+        eqs = [real_equity_estimate(h, b, num_sim=n, profile=p) for h, b, p, n in queries]
+    return dict(zip(calles, eqs))
+
+
+def compute_recommendations(parsed, equity_service=None):
     """
     Genera recomendaciones basadas en equity vs pot odds + tamaño del raise,
     e incluye las cartas del jugador y del board en cada calle.
     """
     recs = []
+    equities = _equities_por_calle(parsed, equity_service)
 
     for calle in ('preflop', 'flop', 'turn', 'river'):
         acciones_calle   = parsed['acciones'][calle]
@@ -344,9 +366,7 @@ def compute_recommendations(parsed):
             pot_after  = pot_before + call_amt
             pot_odds   = (call_amt / pot_after) if pot_after > 0 else 0.0
 
-            hole_nums  = _convertir_cartas(hole_str)
-            board_nums = _convertir_cartas(board_str)
-            eq_player  = real_equity_estimate(hole_nums, board_nums, num_sim=500)
+            eq_player  = equities[calle]
 
             texto = (
                 f"En {calle.upper()}, tenías {hole_display} con board {board_display}. "
@@ -358,9 +378,7 @@ def compute_recommendations(parsed):
 
         # 2) RAISE
         if tipo == 'raise':
-            hole_nums  = _convertir_cartas(hole_str)
-            board_nums = _convertir_cartas(board_str)
-            eq_player  = real_equity_estimate(hole_nums, board_nums, num_sim=500)
+            eq_player  = equities[calle]
 
             pre_stack  = parsed['stack_player_pre'] or 0
             porcentaje = (monto / pre_stack) if pre_stack > 0 else 0.0
@@ -405,13 +423,13 @@ def compute_recommendations(parsed):
     return recs
 
 
-def get_last_stats():
+def get_last_stats(equity_service=None):
     """
     Función para Flask: parsea mano, calcula métricas y recomendaciones.
     """
     parsed          = parse_last_hand()
     metrics         = compute_metrics(parsed)
-    recommendations = compute_recommendations(parsed)
+    recommendations = compute_recommendations(parsed, equity_service)
 
     response = metrics.copy()
     response['recommendations'] = recommendations
@@ -3,6 +3,7 @@
 import pickle
 import matplotlib.pyplot as plt
 from cfr import CFRTrainer
+from equity_service import EquityService
 
 def main():
     phases = ['preflop', 'flop', 'turn', 'river']
@@ -40,9 +41,11 @@ def main():
                 history_avg_regret[phase].append((it, avg_val))
         return logger
 
-    # Entrenamos fase por fase
-    for phase in phases:
-        trainer.train_phase(phase, st_logger=make_logger(phase))
+    # Entrenamos fase por fase (el EHS del clustering se reparte entre procesos)
+    with EquityService() as equity_service:
+        for phase in phases:
+            trainer.train_phase(phase, st_logger=make_logger(phase),
+                                equity_service=equity_service)
 
     # Guardamos el modelo entrenado
     with open('cfr_entreno.pkl', 'wb') as f: